@@ -1,9 +1,11 @@
 # ==================== IMPORTS ====================
 import firebase_admin
 from firebase_admin import credentials, auth, firestore, storage
-from flask import Flask, request, jsonify, redirect
+from flask import Flask, request, jsonify, redirect, Response, stream_with_context
 from flask_cors import CORS
 import base64
+import json
+import math
 import random
 import datetime
 import traceback
@@ -13,12 +15,15 @@ from services.itinerary_service import get_all_itineraries, get_itinerary_by_id
 import os
 from dotenv import load_dotenv
 from amadeus import Client, ResponseError
-from recommender.api_recommender import ItineraryRecommender
+from recommender.api_recommender import get_recommender, warmup_recommender, recommender_status, start_model_watcher
+from recommender.artifacts import version_path
 
 
 # ==================== LOAD ENVIRONMENT ====================
 load_dotenv()
-recommender = ItineraryRecommender()
+
+# Pick up newly trained models without a restart (0 disables polling)
+start_model_watcher(int(os.getenv('RECOMMENDER_RELOAD_INTERVAL', '30')))
 
 # ==================== API CONFIGURATION ====================
 RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')
@@ -1062,15 +1067,55 @@ CATEGORY_MAPPING = {
     'all': ''  
 }
 
+# Minimum local matches before /api/places/nearby skips the Google call
+LOCAL_NEARBY_MIN_RESULTS = 10
+LOCAL_NEARBY_LIMIT = 20  # same page size as Google Nearby Search
+
+def search_nearby_local(lat, lng, radius, google_type):
+    """Nearby POIs from the recommender's spatial index, shaped like Google results"""
+    recommender = get_recommender(wait=False)
+    if recommender is None:
+        return []
+    
+    try:
+        pois = recommender.nearby(
+            float(lat), float(lng),
+            radius_km=float(radius) / 1000,
+            limit=LOCAL_NEARBY_LIMIT,
+            categories=[google_type] if google_type else None
+        )
+    except Exception as e:
+        print(f"⚠️ Local nearby search failed: {e}")
+        return []
+    
+    results = []
+    for poi in pois:
+        types = [t.strip() for t in poi['types'].split(',') if t.strip()]
+        if poi['category'] and poi['category'] not in types:
+            types.insert(0, poi['category'])
+        
+        results.append({
+            'name': poi['name'],
+            'formatted_address': poi['address'] or poi['name'],
+            'geometry': {'location': {'lat': poi['latitude'], 'lng': poi['longitude']}},
+            'rating': poi['rating'] or None,
+            'types': types,
+            'place_id': poi['place_id'],
+            'formatted_phone_number': poi['phone'] or None,
+            'photos': [{'photo_reference': poi['photo_reference']}] if poi['photo_reference'] else []
+        })
+    
+    return results
+
 @app.route('/api/places/nearby', methods=['GET'])
 def search_nearby():
-    """Search for nearby places using Google Places API."""
+    """Search for nearby places, from the local POI index or Google Places API."""
     lat = request.args.get('lat')
     lng = request.args.get('lng')
     radius = request.args.get('radius', 5000)
     place_type = request.args.get('type', 'all')
     
-    if not lat or not lng or not GOOGLE_API_KEY:
+    if not lat or not lng:
         return jsonify({'error': 'Missing parameters or API key'}), 400
     
     try:
@@ -1080,6 +1125,17 @@ def search_nearby():
         google_type = CATEGORY_MAPPING.get(place_type.lower(), place_type)
         print(f"📍 Mapped {place_type} → {google_type}")
         
+        # ✅ Answer from our own POI index first; Google only when coverage is thin
+        local_results = search_nearby_local(lat, lng, radius, google_type)
+        if len(local_results) >= LOCAL_NEARBY_MIN_RESULTS or (local_results and not GOOGLE_API_KEY):
+            print(f"✅ Served {len(local_results)} nearby results from local POI index")
+            return jsonify({'status': 'OK', 'results': local_results, 'source': 'local'})
+        
+        if not GOOGLE_API_KEY:
+            return jsonify({'error': 'Missing parameters or API key'}), 400
+        
+        print(f"⚠️ Local coverage thin ({len(local_results)} results), falling back to Google")
+        
         url = 'https://maps.googleapis.com/maps/api/place/nearbysearch/json'
         params = {
             'location': f'{lat},{lng}',
@@ -1522,6 +1578,34 @@ def get_place_details():
         print(f"❌ Details error: {error}")
         return jsonify({'error': str(error)}), 500
 
+@app.route('/api/places/similar', methods=['GET'])
+def get_similar_places():
+    """Similar places in the same city, from the recommender's precomputed neighbour graph."""
+    place_id = request.args.get('place_id')
+
+    if not place_id:
+        return jsonify({'error': 'Missing place_id'}), 400
+
+    limit = parse_int(request.args.get('limit'), 10, 1, MAX_LIMIT)
+    if limit is None:
+        return jsonify({'error': f'limit must be an integer between 1 and {MAX_LIMIT}'}), 400
+
+    try:
+        recommender = get_recommender(wait=False)
+        if recommender is None:
+            return jsonify({'error': 'Recommender is not available'}), 503
+
+        try:
+            results = recommender.similar_places(place_id, limit=limit)
+        except KeyError:
+            return jsonify({'error': f'Unknown place_id: {place_id}'}), 404
+
+        print(f"✅ Served {len(results)} similar places for {place_id}")
+        return jsonify({'status': 'OK', 'place_id': place_id, 'results': results, 'count': len(results)})
+    except Exception as error:
+        print(f"❌ Similar places error: {error}")
+        return jsonify({'error': str(error)}), 500
+
 @app.route('/api/places/photo', methods=['GET'])
 def get_place_photo():
     """Get photo URL for a place - returns a proper redirect."""
@@ -1594,6 +1678,145 @@ TRAVELER_TYPE_CATEGORIES = {
     'friends': ['restaurant', 'bar', 'night_club', 'shopping_mall', 'tourist_attraction', 'park']
 }
 
+def build_recommendation_categories(travel_styles, with_whom):
+    """Map the user's travel styles and companions to POI categories"""
+    selected_categories = []
+    
+    if travel_styles and len(travel_styles) > 0:
+        print(f"\n🔄 Mapping travel styles to categories...")
+        for style in travel_styles:
+            categories = TRAVEL_STYLE_TO_CATEGORIES.get(style, [])
+            selected_categories.extend(categories)
+            print(f"   {style} → {categories}")
+
+    traveler_categories = TRAVELER_TYPE_CATEGORIES.get(with_whom, [])
+    all_categories = list(set(selected_categories + traveler_categories))
+
+    if not all_categories:
+        all_categories = ['restaurant', 'tourist_attraction', 'museum', 'park']
+        print(f"⚠️ No preferences provided, using defaults: {all_categories}")
+    
+    return all_categories
+
+# Destinations most of our traffic goes to; their default style sets are warmed at startup
+WARMUP_DESTINATIONS = [
+    ('Kuala Lumpur', 'Malaysia'),
+    ('Bangkok', 'Thailand'),
+    ('Tokyo', 'Japan'),
+    ('Paris', 'France')
+]
+
+def default_warmup_queries():
+    """Recommendation queries for each warm destination x companion x (no style or one style)"""
+    queries = []
+    for city, country in WARMUP_DESTINATIONS:
+        for with_whom in TRAVELER_TYPE_CATEGORIES:
+            for styles in [[]] + [[style] for style in TRAVEL_STYLE_TO_CATEGORIES]:
+                queries.append({
+                    'city': city,
+                    'country': country,
+                    'categories': build_recommendation_categories(styles, with_whom),
+                    'traveler_type': with_whom,
+                    'top_n': 40
+                })
+    return queries
+
+# Load the shared recommender in the background and warm its cache with the
+# popular queries (plus the query log, if RECOMMENDER_QUERY_LOG is set).
+# Health reports ready only after warmup; requests wait for it if needed.
+warmup_recommender(background=True, queries=default_warmup_queries())
+
+def wants_ndjson(data):
+    """True if the client asked for a streamed NDJSON response"""
+    return bool(data.get('stream')) or 'application/x-ndjson' in request.headers.get('Accept', '')
+
+def ndjson_response(records):
+    """Stream dicts as newline-delimited JSON, one line per record as it is produced"""
+    def generate():
+        try:
+            for record in records:
+                yield json.dumps(record) + '\n'
+        except Exception as e:
+            print(f"❌ Error while streaming: {e}")
+            traceback.print_exc()
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def recommendation_records(meta, activities):
+    """NDJSON records for one result list: a meta header, one line per activity, a done trailer"""
+    yield dict(meta, type='meta')
+    count = 0
+    for activity in activities:
+        count += 1
+        yield {'type': 'activity', 'activity': activity}
+    yield {'type': 'done', 'count': count}
+
+def trip_records(meta, events):
+    """NDJSON records for a multi-city trip from iter_trip_recommendations events"""
+    yield dict(meta, type='meta')
+    total = 0
+    leg = None
+    for kind, payload in events:
+        if kind == 'activity':
+            total += 1
+            yield {'type': 'activity', 'leg': leg, 'activity': payload}
+        else:
+            leg = payload['leg']
+            yield dict(payload, type=kind)
+    yield {'type': 'done', 'count': total}
+
+def parse_int(value, default, minimum, maximum=None):
+    """Whole number from a request body or query string within [minimum, maximum], or None if it is not one"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, float) and value != number:
+        return None
+    if number < minimum or (maximum is not None and number > maximum):
+        return None
+    return number
+
+# Every distinct limit is its own cache entry, and MMR/trip pools scale with it
+MAX_LIMIT = 200
+MAX_SAVED_PLACE_IDS = 100
+
+def recommendation_options(body, default_limit=40):
+    """limit, diversity and savedPlaceIds from a request body as get_recommendations arguments.
+    
+    Raises ValueError with a client-facing message when a value is invalid;
+    diversity is clamped to 0-1.
+    """
+    top_n = parse_int(body.get('limit'), default_limit, 1, MAX_LIMIT)
+    if top_n is None:
+        raise ValueError(f'limit must be an integer between 1 and {MAX_LIMIT}')
+    
+    diversity = body.get('diversity')
+    if diversity is None:
+        diversity = 0.0
+    try:
+        if isinstance(diversity, bool) or not isinstance(diversity, (int, float, str)):
+            raise TypeError
+        diversity = float(diversity)
+    except (TypeError, ValueError):
+        diversity = float('nan')
+    if not math.isfinite(diversity):
+        raise ValueError('diversity must be a number between 0 and 1')
+    diversity = min(max(diversity, 0.0), 1.0)
+    
+    saved_place_ids = body.get('savedPlaceIds')
+    if saved_place_ids is not None:
+        if (not isinstance(saved_place_ids, list) or len(saved_place_ids) > MAX_SAVED_PLACE_IDS
+                or not all(isinstance(pid, str) and pid for pid in saved_place_ids)):
+            raise ValueError(f'savedPlaceIds must be a list of at most {MAX_SAVED_PLACE_IDS} place id strings')
+        saved_place_ids = saved_place_ids or None
+    
+    return {'top_n': top_n, 'diversity': diversity, 'saved_place_ids': saved_place_ids}
+
 # ==================== ITINERARY RECOMMENDATIONS ROUTES ====================
 @app.route('/api/itinerary/recommendations', methods=['POST', 'OPTIONS'])
 def get_itinerary_recommendations():
@@ -1627,39 +1850,50 @@ def get_itinerary_recommendations():
                 'error': 'City and country are required'
             }), 400
         
+        try:
+            options = recommendation_options(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
         print(f"📍 City: {city}")
         print(f"🌍 Country: {country}")
         print(f"🎨 Travel Styles: {travel_styles}")
         print(f"👥 With Whom: {with_whom}")
         print(f"🌙 Nights: {nights}")
         
-        selected_categories = []
-        
-        if travel_styles and len(travel_styles) > 0:
-            print(f"\n🔄 Mapping travel styles to categories...")
-            for style in travel_styles:
-                categories = TRAVEL_STYLE_TO_CATEGORIES.get(style, [])
-                selected_categories.extend(categories)
-                print(f"   {style} → {categories}")
-
-        traveler_categories = TRAVELER_TYPE_CATEGORIES.get(with_whom, [])
-        all_categories = list(set(selected_categories + traveler_categories))
-
-        if not all_categories:
-            all_categories = ['restaurant', 'tourist_attraction', 'museum', 'park']
-            print(f"⚠️ No preferences provided, using defaults: {all_categories}")
+        all_categories = build_recommendation_categories(travel_styles, with_whom)
         
         print(f"\n📦 Final categories to search: {all_categories}")
         
-        # ✅ Call recommender
-        recommendations = recommender.get_recommendations(
+        recommender = get_recommender()
+        if recommender is None:
+            return jsonify({
+                'success': False,
+                'error': 'Recommender is not available'
+            }), 503
+        
+        query = dict(
             city=city,
             country=country,
             categories=all_categories,
             traveler_type=with_whom,
-            nights=nights
+            nights=nights,
+            **options
         )
         
+        # ✅ Streaming mode: send each activity as soon as top-k selection is done
+        if wants_ndjson(data):
+            print(f"📡 Streaming recommendations as NDJSON")
+            return ndjson_response(recommendation_records(
+                {'city': city, 'country': country}, recommender.iter_recommendations(**query)
+            ))
+        
+        # ✅ Call recommender
+        recommendations = recommender.get_recommendations(**query)
+        
         print(f"\n✅ Got {len(recommendations)} recommendations")
         print("="*60 + "\n")
         
@@ -1682,6 +1916,316 @@ def get_itinerary_recommendations():
             'error': str(e)
         }), 500
 
+MAX_BATCH_QUERIES = 50
+
+@app.route('/api/itinerary/recommendations/batch', methods=['POST', 'OPTIONS'])
+def get_itinerary_recommendations_batch():
+    """Get recommendations for several cities/preference sets in one request"""
+    
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers.add('Access-Control-Allow-Origin', request.headers.get('Origin', '*'))
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'POST,OPTIONS')
+        return response, 200
+    
+    try:
+        data = request.get_json() or {}
+        queries = data.get('queries', [])
+        
+        if not queries:
+            return jsonify({
+                'success': False,
+                'error': 'At least one query is required'
+            }), 400
+        
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_BATCH_QUERIES} queries per batch'
+            }), 400
+        
+        print(f"\n🎯 BATCH RECOMMENDATIONS REQUEST ({len(queries)} queries)")
+        
+        batch = []
+        for query in queries:
+            city = query.get('city') or query.get('destination')
+            country = query.get('country')
+            if not city or not country:
+                return jsonify({
+                    'success': False,
+                    'error': 'City and country are required for every query'
+                }), 400
+            
+            try:
+                options = recommendation_options(query)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
+            
+            with_whom = query.get('withWhom', 'solo')
+            batch.append({
+                'city': city,
+                'country': country,
+                'categories': build_recommendation_categories(
+                    query.get('travelStyles', query.get('interests', [])), with_whom
+                ),
+                'traveler_type': with_whom,
+                'nights': query.get('nights', 3),
+                **options
+            })
+        
+        recommender = get_recommender()
+        if recommender is None:
+            return jsonify({
+                'success': False,
+                'error': 'Recommender is not available'
+            }), 503
+        
+        results = recommender.get_recommendations_batch(batch)
+        
+        return jsonify({
+            'success': True,
+            'results': [
+                {
+                    'city': query['city'],
+                    'country': query['country'],
+                    'activities': activities,
+                    'count': len(activities)
+                }
+                for query, activities in zip(batch, results)
+            ],
+            'count': len(results)
+        }), 200
+        
+    except Exception as e:
+        print(f"❌ Error in batch recommendations: {e}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+MAX_TRIP_LEGS = 20
+
+@app.route('/api/itinerary/trip/recommendations', methods=['POST', 'OPTIONS'])
+def get_trip_recommendations():
+    """Get recommendations for every leg of a multi-city trip in one request"""
+
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers.add('Access-Control-Allow-Origin', request.headers.get('Origin', '*'))
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'POST,OPTIONS')
+        return response, 200
+
+    try:
+        data = request.get_json() or {}
+        legs = data.get('legs', [])
+
+        if not legs:
+            return jsonify({
+                'success': False,
+                'error': 'At least one leg is required'
+            }), 400
+
+        if len(legs) > MAX_TRIP_LEGS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_TRIP_LEGS} legs per trip'
+            }), 400
+
+        try:
+            options = recommendation_options(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        trip = []
+        for leg in legs:
+            city = leg.get('city') or leg.get('destination')
+            country = leg.get('country')
+            if not city or not country:
+                return jsonify({
+                    'success': False,
+                    'error': 'City and country are required for every leg'
+                }), 400
+            limit = parse_int(leg.get('limit'), options['top_n'], 1, MAX_LIMIT)
+            nights = parse_int(leg.get('nights'), 3, 0, MAX_PLAN_NIGHTS)
+            if limit is None or nights is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Every leg needs limit 1-{MAX_LIMIT} and nights 0-{MAX_PLAN_NIGHTS}'
+                }), 400
+            trip.append({
+                'city': city,
+                'country': country,
+                'nights': nights,
+                'top_n': limit
+            })
+
+        print(f"\n🧳 TRIP RECOMMENDATIONS REQUEST ({len(trip)} legs)")
+
+        recommender = get_recommender()
+        if recommender is None:
+            return jsonify({
+                'success': False,
+                'error': 'Recommender is not available'
+            }), 503
+
+        with_whom = data.get('withWhom', 'solo')
+        preferences = dict(
+            categories=build_recommendation_categories(
+                data.get('travelStyles', data.get('interests', [])), with_whom
+            ),
+            traveler_type=with_whom,
+            diversity=options['diversity'],
+            saved_place_ids=options['saved_place_ids']
+        )
+        
+        if wants_ndjson(data):
+            print(f"📡 Streaming trip recommendations as NDJSON")
+            return ndjson_response(trip_records(
+                {'legs': len(trip), 'totalNights': sum(leg['nights'] for leg in trip)},
+                recommender.iter_trip_recommendations(trip, **preferences)
+            ))
+        
+        results = recommender.get_trip_recommendations(trip, **preferences)
+
+        return jsonify({
+            'success': True,
+            'legs': results,
+            'totalNights': sum(leg['nights'] for leg in results),
+            'count': sum(leg['count'] for leg in results)
+        }), 200
+
+    except Exception as e:
+        print(f"❌ Error in trip recommendations: {e}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+MAX_PLAN_NIGHTS = 30
+MAX_ACTIVITIES_PER_DAY = 8
+
+@app.route('/api/itinerary/plan', methods=['POST', 'OPTIONS'])
+def get_itinerary_plan():
+    """Recommend activities and return them grouped into ordered day-by-day routes"""
+    
+    if request.method == 'OPTIONS':
+        response = jsonify({'status': 'ok'})
+        response.headers.add('Access-Control-Allow-Origin', request.headers.get('Origin', '*'))
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'POST,OPTIONS')
+        return response, 200
+    
+    try:
+        data = request.get_json() or {}
+        
+        city = data.get('city') or data.get('destination')
+        country = data.get('country')
+        with_whom = data.get('withWhom', 'solo')
+        
+        if not city or not country:
+            return jsonify({
+                'success': False,
+                'error': 'City and country are required'
+            }), 400
+        
+        # Day clustering grows faster than linearly in nights x activities, so both are capped
+        nights = parse_int(data.get('nights'), 3, 0, MAX_PLAN_NIGHTS)
+        activities_per_day = parse_int(data.get('activitiesPerDay'), 3, 1, MAX_ACTIVITIES_PER_DAY)
+        if nights is None or activities_per_day is None:
+            return jsonify({
+                'success': False,
+                'error': f'nights must be 0-{MAX_PLAN_NIGHTS} and activitiesPerDay 1-{MAX_ACTIVITIES_PER_DAY}'
+            }), 400
+        
+        print(f"\n🗓️ ITINERARY PLAN REQUEST: {city}, {country} ({nights} nights)")
+        
+        recommender = get_recommender()
+        if recommender is None:
+            return jsonify({
+                'success': False,
+                'error': 'Recommender is not available'
+            }), 503
+        
+        plan = recommender.plan_itinerary(
+            city=city,
+            country=country,
+            categories=build_recommendation_categories(
+                data.get('travelStyles', data.get('interests', [])), with_whom
+            ),
+            traveler_type=with_whom,
+            nights=nights,
+            activities_per_day=activities_per_day
+        )
+        
+        return jsonify({
+            'success': True,
+            'plan': plan,
+            'count': sum(len(day['activities']) for day in plan['days'])
+        }), 200
+        
+    except Exception as e:
+        print(f"❌ Error planning itinerary: {e}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/admin/recommender/reload', methods=['POST'])
+def reload_recommender():
+    """Admin-triggered hot reload of the recommender model artifacts"""
+    try:
+        id_token = request.headers.get('Authorization').split('Bearer ')[1]
+        decoded_token = auth.verify_id_token(id_token)
+        caller_uid = decoded_token['uid']
+
+        caller_doc = db.collection('users').document(caller_uid).get()
+        if not caller_doc.exists:
+            return jsonify({"status": "error", "message": "Caller not found."}), 403
+
+        caller_role = caller_doc.to_dict().get('role', '').lower()
+        if caller_role not in ['admin', 'superadmin']:
+            return jsonify({"status": "error", "message": "Forbidden: Insufficient permissions."}), 403
+
+        recommender = get_recommender()
+        if recommender is None:
+            return jsonify({"status": "error", "message": "Recommender is not available."}), 503
+
+        # A named version must be an existing directory under models/artifacts/;
+        # reloading it also repoints CURRENT so every worker rolls over to it
+        data = request.get_json(silent=True) or {}
+        version = data.get('version')
+        if version is not None:
+            try:
+                version_path(recommender.models_dir, version)
+            except (ValueError, FileNotFoundError) as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+        
+        previous_version = recommender.version
+        reloaded = recommender.reload(version, publish=version is not None)
+
+        return jsonify({
+            "status": "success" if reloaded else "error",
+            "previousVersion": previous_version,
+            "version": recommender.version,
+            "reload": recommender.reload_stats
+        }), 200 if reloaded else 500
+
+    except Exception as e:
+        print(f"❌ Error reloading recommender: {e}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 def format_activity(activity):
     """Format activity with all required fields including full place details"""
     formatted = {
@@ -1711,6 +2255,7 @@ def format_activity(activity):
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    recommender_info = recommender_status()
     return jsonify({
         'status': 'healthy',
         'service': 'Travel API',
@@ -1719,7 +2264,9 @@ def health_check():
         'flights': 'Amadeus (10,000/month)', 
         'timestamp': datetime.datetime.now().isoformat(),
         'rapidapi_configured': RAPIDAPI_KEY is not None,
-        'amadeus_configured': os.getenv('AMADEUS_API_KEY') is not None 
+        'amadeus_configured': os.getenv('AMADEUS_API_KEY') is not None,
+        'recommender_ready': recommender_info['ready'],
+        'recommender': recommender_info
     }), 200
 
 # --- Run the App ---
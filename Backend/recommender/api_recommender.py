@@ -1,9 +1,79 @@
 import os
-import pickle
-import pandas as pd
+import json
+import time
+import datetime
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from math import radians, sin, cos, sqrt, atan2
+from recommender.geo import haversine_km, condensed_index, SpatialGrid
+from recommender.encoding import city_key, traveler_bit
+from recommender.artifacts import open_artifacts, current_version, publish_version
+from recommender.result_cache import ResultCache
+from recommender.planner import plan_days
+from recommender.diversity import mmr_select
+from recommender.embeddings import project_queries, dense_scores
+from recommender.cooccurrence import CooccurrenceIndex, COOCCURRENCE_FILE
+
+
+class CityPartition:
+    """POIs of a single (city, country) with their TF-IDF rows and hot columns"""
+    
+    # Columns sliced per partition at load time
+    COLUMNS = ('category_code', 'traveler_mask', 'latitude', 'longitude', 'rating', 'reviews')
+    
+    def __init__(self, key, rows, matrix, columns, distance_km=None, in_radius=None, distances=None,
+                 embeddings=None, embedding_scales=None, center=None, radius_km=None):
+        self.key = key                  # (city, country), lowercased
+        self.rows = rows                # sorted positions into the artifact's POI columns
+        self.matrix = matrix            # TF-IDF rows for this partition (CSR)
+        self.embeddings = embeddings    # int8 LSA rows (None if the artifact has no LSA stage)
+        self.embedding_scales = embedding_scales
+        self.columns = columns          # column name -> NumPy array aligned with rows
+        self.center = center            # (lat, lon) of the city center (None if unknown)
+        self.radius_km = radius_km      # coverage radius around center
+        self.distance_km = distance_km  # distance to center per POI (None if unknown)
+        self.in_radius = in_radius      # distance_km <= radius_km (None if unknown)
+        self.distances = distances      # condensed float16 POI-to-POI km (None if not precomputed)
+    
+    def __len__(self):
+        return len(self.rows)
+
+
+class LoadedModel:
+    """Everything loaded from one artifact version, swapped as a unit on reload"""
+    
+    def __init__(self, artifacts, tfidf, city_index, category_codes, spatial_index, scoring='sparse'):
+        self.artifacts = artifacts
+        self.version = artifacts.version
+        self.tfidf = tfidf
+        self.scoring = scoring                # 'sparse' (TF-IDF) or 'dense' (int8 LSA)
+        self.tfidf_matrix = artifacts.tfidf_matrix
+        self.pois = artifacts.columns
+        self.city_index = city_index
+        self.category_codes = category_codes
+        self.spatial_index = spatial_index    # SpatialGrid over every POI (row = artifact row)
+        
+        # Partitions in artifact row order, for row -> partition lookups
+        self.partitions = sorted(city_index.values(), key=lambda p: p.rows[0] if len(p) else 0)
+        self.partition_starts = np.array([p.rows[0] if len(p) else 0 for p in self.partitions], dtype=np.int64)
+        self._place_rows = None
+        self._place_rows_lock = threading.Lock()
+    
+    def lookup_place_rows(self, place_ids):
+        """Artifact row per place_id (-1 if unknown).
+        
+        Binary search over the artifact's sorted place_id index; artifacts
+        written before it existed fall back to a dict built on first use.
+        """
+        if self.artifacts.place_id_index is not None:
+            return self.artifacts.lookup_place_ids(place_ids)
+        if self._place_rows is None:
+            with self._place_rows_lock:
+                if self._place_rows is None:
+                    column = self.pois['place_id'][np.arange(self.artifacts.n_pois)]
+                    self._place_rows = {pid: row for row, pid in enumerate(column) if pid}
+        return np.array([self._place_rows.get(pid, -1) for pid in place_ids], dtype=np.int64)
 
 
 class ItineraryRecommender:
@@ -169,60 +239,419 @@ class ItineraryRecommender:
         'queenstown': (-45.0312, 168.6626),
     }
     
-    def __init__(self):
-        """Initialize and load trained models"""
-        print("🔄 Loading recommender models...")
+    # Artifacts written before per-city centers/radii existed fall back to
+    # CITY_CENTERS and drop POIs further than this from the center
+    MAX_DISTANCE_KM = 50
+    
+    # Recommendation result cache (bounded LRU with TTL)
+    CACHE_MAX_ENTRIES = 2048
+    CACHE_TTL_SECONDS = 3600
+    
+    # MMR re-ranking picks from the best top_n * MMR_POOL_FACTOR candidates (at most MMR_MAX_POOL)
+    MMR_POOL_FACTOR = 4
+    MMR_MAX_POOL = 200
+    
+    # Ranking blend: TF-IDF similarity, rating / 5, log1p(reviews) / 10
+    SCORE_WEIGHTS = (0.4, 0.4, 0.2)
+    
+    # Weight of the "people who saved X also saved Y" signal (normalized to 0-1)
+    COOCCURRENCE_WEIGHT = 0.15
+    
+    # Multi-city trips with at least this many uncached legs fan out to a
+    # process pool forked from the serving process (POSIX only)
+    TRIP_POOL_MIN_LEGS = 8
+    TRIP_POOL_WORKERS = min(4, os.cpu_count() or 1)
+    
+    # Popular queries precomputed and pinned in the cache after every model load
+    WARMUP_MAX_QUERIES = 200
+    
+    # Query popularity is counted in memory and merged into the query log file
+    # at most this often; the file keeps only the most frequent queries
+    QUERY_LOG_FLUSH_SECONDS = 60
+    QUERY_LOG_MAX_ENTRIES = 2000
+    
+    # Rows serialized per step when streaming results
+    STREAM_CHUNK_ROWS = 32
+    
+    # 'sparse' scores TF-IDF rows; 'dense' scores the artifact's int8 LSA embeddings
+    SCORING_MODES = ('sparse', 'dense')
+    
+    # Response fields in payload order, with the default used if a column is absent
+    RESULT_FIELDS = (
+        ('name', ''), ('category', ''), ('latitude', 0.0), ('longitude', 0.0),
+        ('address', ''), ('phone', ''), ('website', ''), ('rating', 0.0), ('reviews', 0),
+        ('place_id', None), ('photo_reference', None), ('suitable_for', ''),
+        ('city', ''), ('country', ''), ('types', '')
+    )
+    
+    def __init__(self, models_dir=None, scoring=None, query_log_path=None):
+        """Initialize and load trained models.
         
+        scoring picks the similarity mode (default: RECOMMENDER_SCORING env var, else 'sparse').
+        query_log_path (default: RECOMMENDER_QUERY_LOG env var, else off; False disables)
+        keeps per-query counts of non-personalized requests; warm_cache() reads it back.
+        """
         current_dir = os.path.dirname(os.path.abspath(__file__))
-        models_dir = os.path.join(current_dir, 'models')
+        self.models_dir = models_dir or os.path.join(current_dir, 'models')
+        self.scoring = (scoring or os.getenv('RECOMMENDER_SCORING', 'sparse')).strip().lower()
+        if self.scoring not in self.SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{self.scoring}' (expected one of {self.SCORING_MODES})")
         
-        print(f"📂 Models directory: {models_dir}")
-        
-        self.vectorizer_path = os.path.join(models_dir, 'tfidf_vectorizer.pkl')
-        self.matrix_path = os.path.join(models_dir, 'tfidf_matrix.pkl')
-        self.data_path = os.path.join(models_dir, 'pois_data.pkl')
+        self.cache = ResultCache(self.CACHE_MAX_ENTRIES, self.CACHE_TTL_SECONDS)
+        self._reload_lock = threading.Lock()
+        self._trip_pool = None
+        self._trip_pool_version = None
+        self._trip_pool_lock = threading.Lock()
+        if query_log_path is None:
+            query_log_path = os.getenv('RECOMMENDER_QUERY_LOG')
+        self.query_log_path = query_log_path or None
+        self._query_counts = {}
+        self._query_log_lock = threading.Lock()
+        self._query_log_flushed = time.monotonic()
+        self.warmup_queries = []
+        self.warmup_stats = {'queries': 0, 'pinned': 0, 'duration_ms': None}
+        self.reload_stats = {
+            'reloads': 0,
+            'failures': 0,
+            'last_reload': None,
+            'last_duration_ms': None,
+            'last_error': None
+        }
         
         try:
-            with open(self.vectorizer_path, 'rb') as f:
-                self.tfidf = pickle.load(f)
-            print("   ✅ Loaded TF-IDF vectorizer")
-            
-            with open(self.matrix_path, 'rb') as f:
-                self.tfidf_matrix = pickle.load(f)
-            print("   ✅ Loaded TF-IDF matrix")
-            
-            self.df = pd.read_pickle(self.data_path)
-            print(f"   ✅ Loaded {len(self.df):,} POIs")
-            
-            print(f"\n📊 Available data:")
-            print(f"   Countries: {self.df['country'].nunique()}")
-            print(f"   Cities: {self.df['city'].nunique()}")
-            print(f"   Categories: {self.df['category'].nunique()}\n")
-            
+            self.model = self._load_model()
         except FileNotFoundError as e:
             print(f"❌ Error loading models: {e}")
-            print(f"📍 Expected path: {models_dir}")
+            print(f"📍 Expected path: {self.models_dir}")
             print("Please run 'python train_recommender.py' first!")
             raise
         except Exception as e:
             print(f"❌ Unexpected error loading models: {e}")
             raise
+        
+        # Last CURRENT value the watcher acted on; a manual reload to another
+        # version sticks until CURRENT itself changes
+        self._seen_current = current_version(self.models_dir)
+        
+        self.cooccurrence = None
+        self._cooccurrence_mtime = None
+        self._load_cooccurrence()
     
-    def calculate_distance(self, lat1, lon1, lat2, lon2):
-        """Calculate distance between two points in km using Haversine formula"""
-        R = 6371  # Earth's radius in km
+    @property
+    def version(self):
+        return self.model.version
+    
+    def _load_model(self, version=None):
+        """Open an artifact version and build everything derived from it"""
+        print("🔄 Loading recommender models...")
+        print(f"📂 Models directory: {self.models_dir}")
+        
+        # Arrays are memory-mapped, so this is cheap and shared across workers
+        artifacts = open_artifacts(self.models_dir, version)
+        print(f"   ✅ Opened model artifacts (version {artifacts.version})")
+        
+        tfidf = artifacts.build_vectorizer()
+        print(f"   ✅ Loaded TF-IDF query vectorizer ({len(artifacts.vocabulary):,} terms)")
+        print(f"   ✅ Loaded {artifacts.n_pois:,} POIs")
+        
+        scoring = self.scoring
+        if scoring == 'dense' and artifacts.lsa_codes is None:
+            print("   ⚠️ Artifact has no LSA embeddings, falling back to sparse scoring")
+            scoring = 'sparse'
+        print(f"   ✅ Scoring mode: {scoring}")
+        
+        model = LoadedModel(
+            artifacts=artifacts,
+            tfidf=tfidf,
+            city_index=self._build_city_index(artifacts),
+            category_codes={name: code for code, name in enumerate(artifacts.categories)},
+            spatial_index=self._open_spatial_grid(artifacts),
+            scoring=scoring
+        )
+        print(f"   ✅ {'Mapped' if artifacts.spatial_grid else 'Built'} spatial grid over "
+              f"{len(model.spatial_index):,} POIs")
+        
+        print(f"\n📊 Available data:")
+        print(f"   Countries: {len({country for _, country in model.city_index})}")
+        print(f"   Cities: {len(model.city_index)}")
+        print(f"   Categories: {len(model.category_codes)}\n")
+        
+        return model
+    
+    @staticmethod
+    def _open_spatial_grid(artifacts):
+        """SpatialGrid over the mapped coordinate columns, using the stored cell index if present"""
+        latitudes, longitudes = artifacts.columns['latitude'], artifacts.columns['longitude']
+        if not artifacts.spatial_grid:
+            return SpatialGrid(latitudes, longitudes)
+        return SpatialGrid(
+            latitudes, longitudes, artifacts.spatial_grid['cell_deg'],
+            order=artifacts.spatial_order,
+            cell_keys=artifacts.spatial_cell_keys,
+            cell_starts=artifacts.spatial_cell_starts
+        )
+    
+    def _build_city_index(self, artifacts):
+        """Index the contiguous (city, country) row ranges stored in the artifact"""
+        city_index = {}
+        for index, (city, country, start, stop) in enumerate(artifacts.partitions):
+            columns = {col: artifacts.columns[col][start:stop] for col in CityPartition.COLUMNS}
+            
+            # City center, radius and in-radius mask were derived from the POIs at train time
+            distance_km = in_radius = None
+            if artifacts.city_geometry is not None:
+                center_lat, center_lon, radius_km = artifacts.city_geometry[index]
+                center = (center_lat, center_lon)
+                distance_km = artifacts.city_distance_km[start:stop]
+                in_radius = artifacts.in_radius[start:stop]
+            else:
+                center, radius_km = self.CITY_CENTERS.get(city), self.MAX_DISTANCE_KM
+                if center is not None:
+                    distance_km = haversine_km(center[0], center[1], columns['latitude'], columns['longitude'])
+                    in_radius = distance_km <= radius_km
+            
+            city_index[(city, country)] = CityPartition(
+                key=(city, country),
+                rows=np.arange(start, stop),
+                matrix=artifacts.matrix_rows(start, stop),
+                columns=columns,
+                distance_km=distance_km,
+                in_radius=in_radius,
+                distances=artifacts.partition_distances(index),
+                embeddings=artifacts.lsa_codes[start:stop] if artifacts.lsa_codes is not None else None,
+                embedding_scales=artifacts.lsa_scales[start:stop] if artifacts.lsa_scales is not None else None,
+                center=center,
+                radius_km=radius_km
+            )
+        
+        print(f"   ✅ Indexed {len(city_index)} city partitions")
+        return city_index
+    
+    # ========== HOT RELOAD ==========
+    def reload(self, version=None, publish=False):
+        """Load an artifact version in the caller's thread and swap it in atomically.
+        
+        Requests already running keep the LoadedModel they started with and
+        finish against the old version. publish=True also points CURRENT at the
+        loaded version, so other workers follow (e.g. an admin rollback).
+        Returns True if a new model was swapped in.
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            try:
+                new_model = self._load_model(version)
+            except Exception as e:
+                self.reload_stats['failures'] += 1
+                self.reload_stats['last_error'] = str(e)
+                print(f"❌ Model reload failed, keeping version {self.model.version}: {e}")
+                return False
+            
+            # Warm the new model before swapping so popular queries never go cold
+            pinned = self._warm_entries(new_model)
+            
+            if publish:
+                try:
+                    publish_version(self.models_dir, new_model.version)
+                except Exception as e:
+                    self.reload_stats['failures'] += 1
+                    self.reload_stats['last_error'] = str(e)
+                    print(f"❌ Could not publish version {new_model.version}: {e}")
+                    return False
+                self._seen_current = new_model.version
+            
+            old_version = self.model.version
+            self.model = new_model
+            self.cache.clear()
+            for key, results in pinned:
+                self.cache.pin(key, results)
+            
+            self.reload_stats['reloads'] += 1
+            self.reload_stats['last_reload'] = datetime.datetime.now().isoformat()
+            self.reload_stats['last_duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            self.reload_stats['last_error'] = None
+            print(f"🔁 Reloaded recommender: {old_version} → {new_model.version}")
+            return True
+    
+    def check_for_update(self):
+        """Reload when models/artifacts/CURRENT changes (and pick up a rewritten
+        co-occurrence file).
+        
+        Compares against the last CURRENT value seen, not the loaded version,
+        so a manual reload of another version isn't undone on the next tick.
+        """
+        self._load_cooccurrence()
+        latest = current_version(self.models_dir)
+        if latest is None or latest == self._seen_current:
+            return False
+        if latest == self.model.version:
+            self._seen_current = latest
+            return False
+        if not self.reload(latest):
+            return False
+        self._seen_current = latest
+        return True
+    
+    def _load_cooccurrence(self):
+        """(Re)load models/cooccurrence.npz when build_cooccurrence.py has rewritten it"""
+        path = os.path.join(self.models_dir, COOCCURRENCE_FILE)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if mtime is None or mtime == self._cooccurrence_mtime:
+            return False
+        try:
+            cooccurrence = CooccurrenceIndex.load(self.models_dir)
+        except Exception as e:
+            print(f"⚠️ Could not load co-occurrence counts: {e}")
+            return False
+        self.cooccurrence = cooccurrence
+        self._cooccurrence_mtime = mtime
+        print(f"   ✅ Loaded co-occurrence counts for {len(cooccurrence):,} places (version {cooccurrence.version})")
+        return True
+    
+    # ========== CACHE WARMUP ==========
+    def warm_cache(self, queries=None):
+        """Precompute popular queries and pin their results in the cache.
         
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        queries (dicts of get_recommendations arguments) replace the configured
+        list; the most frequent queries from the query log are added after them,
+        up to WARMUP_MAX_QUERIES. The same set is re-warmed on every reload.
+        """
+        if queries is not None:
+            self.warmup_queries = list(queries)
+        for key, results in self._warm_entries(self.model):
+            self.cache.pin(key, results)
+        return dict(self.warmup_stats)
+    
+    def _warm_entries(self, model):
+        """(cache key, results) for each warmup query, computed against `model`"""
+        started = time.perf_counter()
+        candidates = self._warmup_candidates()
+        entries = {}
+        for query in candidates:
+            if len(entries) >= self.WARMUP_MAX_QUERIES:
+                break
+            categories = query.get('categories', [])
+            traveler_type = query.get('traveler_type', 'solo')
+            top_n = query.get('top_n', 40)
+            diversity = query.get('diversity', 0.0)
+            key = self._cache_key(model, query['city'], query['country'], categories, traveler_type, top_n, diversity)
+            if key in entries:
+                continue
+            try:
+                entries[key] = self._compute_recommendations(
+                    model, query['city'], query['country'], categories, traveler_type, top_n, diversity
+                )
+            except Exception as e:
+                print(f"⚠️ Warmup query failed for {query.get('city')}, {query.get('country')}: {e}")
+        
+        self.warmup_stats = {
+            'queries': len(candidates),
+            'pinned': len(entries),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        if candidates:
+            print(f"🔥 Warmed {len(entries)} popular queries in {self.warmup_stats['duration_ms']} ms")
+        return list(entries.items())
+    
+    def _warmup_candidates(self):
+        """Configured warmup queries, then logged queries by descending frequency"""
+        candidates = list(self.warmup_queries)
+        if not self.query_log_path:
+            return candidates
+        
+        self._flush_query_log()
+        ranked = sorted(self._read_query_log().values(), key=lambda entry: -entry[0])
+        return candidates + [query for _, query in ranked[:self.WARMUP_MAX_QUERIES]]
+    
+    @staticmethod
+    def _query_key(city, country, categories, traveler_type, top_n, diversity):
+        return (city_key(city, country), tuple(sorted(set(categories))), traveler_type, top_n, diversity)
+    
+    def _log_query(self, city, country, categories, traveler_type, top_n, diversity):
+        """Count one request for warmup (no-op unless a log path is set).
         
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
+        Only an in-memory dict is touched on the request path; counts may be
+        lost under races, which is fine for a popularity ranking.
+        """
+        if not self.query_log_path:
+            return
+        key = self._query_key(city, country, categories, traveler_type, top_n, diversity)
+        entry = self._query_counts.get(key)
+        if entry is None:
+            self._query_counts[key] = [1, {
+                'city': city, 'country': country, 'categories': list(categories),
+                'traveler_type': traveler_type, 'top_n': top_n, 'diversity': diversity
+            }]
+        else:
+            entry[0] += 1
+        if time.monotonic() - self._query_log_flushed >= self.QUERY_LOG_FLUSH_SECONDS:
+            self._flush_query_log()
+    
+    def _read_query_log(self):
+        """query key -> [count, query] from the query log file (empty if missing)"""
+        counts = {}
+        try:
+            with open(self.query_log_path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return counts
+        for line in lines:
+            try:
+                query = json.loads(line)
+                count = int(query.pop('count', 1))
+                key = self._query_key(
+                    query['city'], query['country'], query.get('categories', []),
+                    query.get('traveler_type', 'solo'), query.get('top_n', 40), query.get('diversity', 0.0)
+                )
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            if key in counts:
+                counts[key][0] += count
+            else:
+                counts[key] = [count, query]
+        return counts
+    
+    def _flush_query_log(self):
+        """Merge the in-memory counts into the query log file, keeping the most frequent.
         
-        return R * c
+        Skipped if another thread is already flushing; the file is replaced atomically.
+        """
+        if not self._query_log_lock.acquire(blocking=False):
+            return
+        try:
+            self._query_log_flushed = time.monotonic()
+            counts, self._query_counts = self._query_counts, {}
+            if not counts:
+                return
+            merged = self._read_query_log()
+            for key, (count, query) in counts.items():
+                if key in merged:
+                    merged[key][0] += count
+                else:
+                    merged[key] = [count, query]
+            ranked = sorted(merged.values(), key=lambda entry: -entry[0])[:self.QUERY_LOG_MAX_ENTRIES]
+            
+            tmp_path = f"{self.query_log_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for count, query in ranked:
+                    f.write(json.dumps(dict(query, count=count)) + '\n')
+            os.replace(tmp_path, self.query_log_path)
+        except OSError as e:
+            print(f"⚠️ Could not write query log: {e}")
+        finally:
+            self._query_log_lock.release()
+    
+    def calculate_distance(self, lat1, lon1, lat2, lon2):
+        """Calculate distance between two points in km using Haversine formula"""
+        return float(haversine_km(lat1, lon1, lat2, lon2))
     
-    def get_recommendations(self, city, country, categories, traveler_type='solo', nights=3, top_n=40):
-        """Get POI recommendations for itinerary"""
+    def get_recommendations(self, city, country, categories, traveler_type='solo', nights=3, top_n=40, diversity=0.0,
+                            saved_place_ids=None):
+        """Get POI recommendations for itinerary.
+        
+        diversity (0-1) turns on MMR re-ranking to spread results over dissimilar POIs.
+        saved_place_ids (places the user already saved) boosts POIs that other
+        users saved together with them.
+        """
         
         print(f"\n🎯 Getting recommendations:")
         print(f"   📍 {city}, {country}")
@@ -230,115 +659,727 @@ class ItineraryRecommender:
         print(f"   👥 Traveler: {traveler_type}")
         print(f"   🌙 Nights: {nights}")
         print(f"   📊 Limit: {top_n}")
+        if diversity:
+            print(f"   🎲 Diversity: {diversity}")
+        if saved_place_ids:
+            print(f"   💾 Saved places: {len(saved_place_ids)}")
+        
+        if not saved_place_ids:
+            self._log_query(city, country, categories, traveler_type, top_n, diversity)
+        
+        # Pin one model for the whole request so a concurrent reload can't mix versions
+        model = self.model
+        cache_key = self._cache_key(
+            model, city, country, categories, traveler_type, top_n, diversity, saved_place_ids
+        )
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            print(f"   ⚡ Cache hit, returning {len(cached)} recommendations")
+            return [dict(poi) for poi in cached]
         
         try:
-            # Filter by city and country
-            city_filter = (
-                (self.df['city'].str.lower() == city.lower()) & 
-                (self.df['country'].str.lower() == country.lower())
+            recommendations = self._compute_recommendations(
+                model, city, country, categories, traveler_type, top_n, diversity, saved_place_ids
             )
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+        
+        self.cache.put(cache_key, recommendations)
+        
+        print(f"\n✅ Returning {len(recommendations)} recommendations")
+        return [dict(poi) for poi in recommendations]
+    
+    def iter_recommendations(self, city, country, categories, traveler_type='solo', nights=3, top_n=40,
+                             diversity=0.0, saved_place_ids=None):
+        """Same results as get_recommendations, yielded one dict at a time.
+        
+        Top-k selection runs first; rows are then serialized STREAM_CHUNK_ROWS at
+        a time, so a caller can send the first card early. Cached results are
+        streamed from the cache; fresh ones are cached once the whole stream
+        has been consumed (an abandoned stream caches nothing).
+        """
+        if not saved_place_ids:
+            self._log_query(city, country, categories, traveler_type, top_n, diversity)
+        
+        model = self.model
+        cache_key = self._cache_key(
+            model, city, country, categories, traveler_type, top_n, diversity, saved_place_ids
+        )
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            for poi in cached:
+                yield dict(poi)
+            return
+        
+        top_rows, top_scores = self._compute_top(
+            model, city, country, categories, traveler_type, top_n, diversity, saved_place_ids
+        )
+        recommendations = []
+        for start in range(0, len(top_rows), self.STREAM_CHUNK_ROWS):
+            chunk = slice(start, start + self.STREAM_CHUNK_ROWS)
+            for poi in self._serialize_rows(model, top_rows[chunk], score=top_scores[chunk]):
+                recommendations.append(poi)
+                yield dict(poi)
+        self.cache.put(cache_key, recommendations)
+    
+    def get_recommendations_batch(self, queries):
+        """Get recommendations for many queries in one vectorized pass.
+        
+        Each query is a dict with city, country, categories and optionally
+        traveler_type, nights, top_n, diversity and saved_place_ids (same defaults
+        as get_recommendations).
+        All query strings go through one tfidf.transform call; each city's
+        candidate rows are then scored in one product against that city's queries.
+        Returns one result list per query, in order.
+        """
+        model = self.model
+        print(f"\n🎯 Getting batch recommendations for {len(queries)} queries")
+        
+        results = [None] * len(queries)
+        pending = []  # (query index, cache key, partition, local positions, top_n, diversity, saved, search query)
+        
+        for i, query in enumerate(queries):
+            city, country = query['city'], query['country']
+            categories = query.get('categories', [])
+            traveler_type = query.get('traveler_type', 'solo')
+            top_n = query.get('top_n', 40)
+            diversity = query.get('diversity', 0.0)
+            saved_place_ids = query.get('saved_place_ids')
+            if not saved_place_ids:
+                self._log_query(city, country, categories, traveler_type, top_n, diversity)
             
-            category_filter = self.df['category'].isin(categories)
-            traveler_filter = self.df['suitable_for'].str.contains(traveler_type, case=False, na=False)
-            
-            # Combine filters
-            combined_filter = city_filter & category_filter & traveler_filter
-            filtered_df = self.df[combined_filter].copy()
-            
-            print(f"   🔍 Filtered POIs (with traveler): {len(filtered_df)}")
+            cache_key = self._cache_key(
+                model, city, country, categories, traveler_type, top_n, diversity, saved_place_ids
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                results[i] = [dict(poi) for poi in cached]
+                continue
             
-            # Relax filters if needed
-            if len(filtered_df) < top_n:
-                print(f"   ⚠️ Not enough results, relaxing traveler filter...")
-                combined_filter = city_filter & category_filter
-                filtered_df = self.df[combined_filter].copy()
-                print(f"   🔍 Filtered POIs (without traveler): {len(filtered_df)}")
+            try:
+                partition, local_positions = self._select_candidates(
+                    model, city, country, categories, traveler_type, top_n
+                )
+            except Exception as e:
+                print(f"❌ Error filtering {city}, {country}: {e}")
+                results[i] = []
+                continue
             
-            if len(filtered_df) < top_n:
-                print(f"   ⚠️ Still not enough, using all categories...")
-                filtered_df = self.df[city_filter].copy()
-                print(f"   🔍 Filtered POIs (all categories): {len(filtered_df)}")
+            if len(local_positions) == 0:
+                self.cache.put(cache_key, [])
+                results[i] = []
+                continue
             
-            # ✅ DISTANCE VALIDATION
-            city_lower = city.lower().strip()
-            if city_lower in self.CITY_CENTERS:
-                city_lat, city_lon = self.CITY_CENTERS[city_lower]
-                
-                print(f"   🌍 Validating distance from city center...")
-                
-                filtered_df['distance_km'] = filtered_df.apply(
-                    lambda row: self.calculate_distance(
-                        city_lat, city_lon,
-                        row['latitude'], row['longitude']
-                    ), axis=1
-                )
-                
-                print(f"   📊 Distance range: {filtered_df['distance_km'].min():.1f}km - {filtered_df['distance_km'].max():.1f}km")
+            search_query = self._search_query(city, categories, traveler_type)
+            pending.append((i, cache_key, partition, local_positions, top_n, diversity, saved_place_ids, search_query))
+        
+        if pending:
+            try:
+                # One vectorizer call for every query string
+                query_vectors = self._query_vectors(model, [p[7] for p in pending])
                 
-                max_distance_km = 50
-                filtered_df = filtered_df[filtered_df['distance_km'] <= max_distance_km].copy()
+                # Per city: the union of its queries' candidate rows, scored in one
+                # product against only that city's query columns
+                by_partition = {}
+                for column, entry in enumerate(pending):
+                    by_partition.setdefault(entry[2].key, []).append(column)
                 
-                print(f"   ✅ Filtered by distance (<{max_distance_km}km): {len(filtered_df)} POIs")
-            else:
-                print(f"   ⚠️ No city center data for {city}, skipping distance validation")
-            
-            if len(filtered_df) == 0:
-                print(f"   ❌ No POIs found for {city}, {country}")
-                return []
-            
-            # TF-IDF ranking
-            search_query = f"{city} {' '.join(categories)} {traveler_type}"
-            query_vec = self.tfidf.transform([search_query])
-            
-            filtered_indices = filtered_df.index.tolist()
-            filtered_tfidf = self.tfidf_matrix[filtered_indices]
-            similarity_scores = cosine_similarity(query_vec, filtered_tfidf).flatten()
-            
-            filtered_df['similarity_score'] = similarity_scores
-            
-            filtered_df['combined_score'] = (
-                filtered_df['similarity_score'] * 0.4 +
-                (filtered_df['rating'] / 5.0) * 0.4 +
-                (np.log1p(filtered_df['reviews']) / 10.0) * 0.2
-            )
+                for columns in by_partition.values():
+                    partition = pending[columns[0]][2]
+                    union_positions, inverse = np.unique(
+                        np.concatenate([pending[column][3] for column in columns]), return_inverse=True
+                    )
+                    scores = self._score_rows(model, partition.rows[union_positions], query_vectors[:, columns])
+                    
+                    offset = 0
+                    for group_column, column in enumerate(columns):
+                        i, cache_key, _, local_positions, top_n, diversity, saved_place_ids, _ = pending[column]
+                        positions = inverse[offset:offset + len(local_positions)]
+                        offset += len(local_positions)
+                        
+                        recommendations = self._rank_candidates(
+                            model, partition, local_positions, scores[positions, group_column], top_n, diversity,
+                            self._collaborative_scores(model, partition, local_positions, saved_place_ids)
+                        )
+                        self.cache.put(cache_key, recommendations)
+                        results[i] = [dict(poi) for poi in recommendations]
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                import traceback
+                traceback.print_exc()
+                for i, *_ in pending:
+                    results[i] = []
+        
+        print(f"✅ Returning batch of {len(results)} result lists")
+        return results
+    
+    def _cache_key(self, model, city, country, categories, traveler_type, top_n, diversity=0.0,
+                   saved_place_ids=None):
+        """Normalized request key, scoped to the loaded model (and co-occurrence) version.
+        
+        Nights is not part of it: it doesn't change the ranking.
+        """
+        saved = ()
+        if saved_place_ids and self.cooccurrence is not None:
+            saved = (self.cooccurrence.version, tuple(sorted(set(saved_place_ids))))
+        return (
+            model.version,
+            city_key(city, country),
+            tuple(sorted(set(categories))),
+            str(traveler_type).strip().lower(),
+            str(top_n).strip(),
+            float(diversity or 0.0),
+            saved
+        )
+    
+    def _compute_recommendations(self, model, city, country, categories, traveler_type, top_n, diversity=0.0,
+                                 saved_place_ids=None):
+        """Filter, score and serialize recommendations for one request (uncached)"""
+        top_rows, top_scores = self._compute_top(
+            model, city, country, categories, traveler_type, top_n, diversity, saved_place_ids
+        )
+        return self._serialize_rows(model, top_rows, score=top_scores)
+    
+    def _compute_top(self, model, city, country, categories, traveler_type, top_n, diversity=0.0,
+                     saved_place_ids=None):
+        """Filter and score one request; returns (artifact rows, scores) best first"""
+        partition, local_positions = self._select_candidates(model, city, country, categories, traveler_type, top_n)
+        
+        if len(local_positions) == 0:
+            print(f"   ❌ No POIs found for {city}, {country}")
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        
+        # One product over the whole partition gives the cosine score of every POI
+        query_vectors = self._query_vectors(model, [self._search_query(city, categories, traveler_type)])
+        similarity_scores = self._score_partition(model, partition, query_vectors)[:, 0]
+        
+        return self._top_candidates(
+            partition, local_positions, similarity_scores[local_positions], top_n, diversity,
+            self._collaborative_scores(model, partition, local_positions, saved_place_ids)
+        )
+    
+    def _collaborative_scores(self, model, partition, local_positions, saved_place_ids):
+        """Co-save counts with the user's saved places, scaled to 0-1 per candidate.
+        
+        One sparse row read per saved place; returns None when there is no signal.
+        """
+        cooccurrence = self.cooccurrence
+        if not saved_place_ids or cooccurrence is None:
+            return None
+        related = cooccurrence.related(saved_place_ids)
+        if not related:
+            return None
+        
+        rows = model.lookup_place_rows(list(related))
+        counts = np.fromiter(related.values(), dtype=np.float64, count=len(related))
+        known = rows >= 0
+        if not known.any():
+            return None
+        rows, counts = rows[known], counts[known]
+        
+        # Candidate rows are sorted, so each related row is found by binary search
+        candidate_rows = partition.rows[local_positions]
+        slots = np.searchsorted(candidate_rows, rows)
+        found = slots < len(candidate_rows)
+        found[found] = candidate_rows[slots[found]] == rows[found]
+        if not found.any():
+            return None
+        
+        scores = np.zeros(len(local_positions), dtype=np.float64)
+        scores[slots[found]] = counts[found]
+        return scores / scores.max()
+    
+    # ========== MULTI-CITY TRIPS ==========
+    def get_trip_recommendations(self, legs, categories, traveler_type='solo', top_n=40, diversity=0.0,
+                                 saved_place_ids=None):
+        """Recommendations for every leg of a multi-city trip, in leg order.
+        
+        Each leg is a dict with city, country and optionally nights and top_n.
+        Legs are computed together as one batch; large trips are split across
+        a process pool whose workers were forked with the memory-mapped model.
+        """
+        queries = [{
+            'city': leg['city'],
+            'country': leg['country'],
+            'categories': categories,
+            'traveler_type': traveler_type,
+            'nights': leg.get('nights', 3),
+            'top_n': leg.get('top_n', top_n),
+            'diversity': diversity,
+            'saved_place_ids': saved_place_ids
+        } for leg in legs]
+        
+        print(f"\n🧳 Multi-city trip: {' → '.join(q['city'] for q in queries)}")
+        if len(queries) >= self.TRIP_POOL_MIN_LEGS and 'fork' in multiprocessing.get_all_start_methods():
+            results = self._pooled_batch(queries)
+        else:
+            results = self.get_recommendations_batch(queries)
+        
+        return [
+            {
+                'leg': number,
+                'city': query['city'],
+                'country': query['country'],
+                'nights': query['nights'],
+                'activities': activities,
+                'count': len(activities)
+            }
+            for number, (query, activities) in enumerate(zip(queries, results), start=1)
+        ]
+    
+    def iter_trip_recommendations(self, legs, categories, traveler_type='solo', top_n=40, diversity=0.0,
+                                  saved_place_ids=None):
+        """Streaming form of get_trip_recommendations.
+        
+        Yields ('leg', leg info) before each leg's activities, then ('activity', dict)
+        per activity as soon as that leg's top-k is selected, then ('leg_end', leg info
+        with count). Legs are computed one after another so the first leg arrives first.
+        """
+        for number, leg in enumerate(legs, start=1):
+            info = {'leg': number, 'city': leg['city'], 'country': leg['country'], 'nights': leg.get('nights', 3)}
+            yield 'leg', info
+            count = 0
+            for activity in self.iter_recommendations(
+                leg['city'], leg['country'], categories, traveler_type, info['nights'],
+                leg.get('top_n', top_n), diversity, saved_place_ids
+            ):
+                count += 1
+                yield 'activity', activity
+            yield 'leg_end', dict(info, count=count)
+    
+    def _pooled_batch(self, queries):
+        """get_recommendations_batch with the uncached queries split across the trip pool.
+        
+        Queries are logged here; workers don't log, so each leg counts once.
+        """
+        model = self.model
+        for q in queries:
+            if not q['saved_place_ids']:
+                self._log_query(q['city'], q['country'], q['categories'], q['traveler_type'], q['top_n'],
+                                q['diversity'])
+        keys = [
+            self._cache_key(model, q['city'], q['country'], q['categories'], q['traveler_type'], q['top_n'],
+                            q['diversity'], q['saved_place_ids'])
+            for q in queries
+        ]
+        results = [self.cache.get(key) for key in keys]
+        misses = [i for i, cached in enumerate(results) if cached is None]
+        
+        if misses:
+            pool = self._get_trip_pool(model)
+            n_chunks = min(self.TRIP_POOL_WORKERS, len(misses))
+            chunks = [misses[c::n_chunks] for c in range(n_chunks)]
+            futures = [pool.submit(_trip_pool_batch, [queries[i] for i in chunk]) for chunk in chunks]
+            print(f"   🔀 Fanned {len(misses)} legs out to {n_chunks} worker processes")
             
-            top_pois = filtered_df.nlargest(min(top_n, len(filtered_df)), 'combined_score')
+            for chunk, future in zip(chunks, futures):
+                for i, activities in zip(chunk, future.result()):
+                    self.cache.put(keys[i], activities)
+                    results[i] = activities
+        
+        return [[dict(poi) for poi in activities] for activities in results]
+    
+    def _get_trip_pool(self, model):
+        """Process pool forked from this process, recreated after a model reload"""
+        global _trip_pool_recommender
+        
+        with self._trip_pool_lock:
+            version = (model.version, self.cooccurrence.version if self.cooccurrence is not None else None)
+            if self._trip_pool is not None and self._trip_pool_version != version:
+                self._trip_pool.shutdown(wait=False)
+                self._trip_pool = None
+            if self._trip_pool is None:
+                # Workers inherit this recommender (and its mapped arrays) through fork
+                _trip_pool_recommender = self
+                self._trip_pool = ProcessPoolExecutor(
+                    max_workers=self.TRIP_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=_init_trip_pool_worker
+                )
+                self._trip_pool_version = version
+            return self._trip_pool
+    
+    # ========== SIMILARITY SCORING ==========
+    # TF-IDF rows, LSA embeddings and query vectors are all L2-normalized,
+    # so a plain dot product is the cosine similarity in either mode.
+    def _query_vectors(self, model, texts):
+        """Query strings as (dims, n_queries) columns in the model's scoring space"""
+        query_matrix = model.tfidf.transform(texts)
+        if model.scoring == 'dense':
+            return project_queries(query_matrix, model.artifacts.lsa_components)
+        return query_matrix.T.toarray()
+    
+    def _score_partition(self, model, partition, query_vectors):
+        """Similarity of every partition row to each query column"""
+        if model.scoring == 'dense':
+            return dense_scores(partition.embeddings, partition.embedding_scales, query_vectors)
+        return partition.matrix @ query_vectors
+    
+    def _score_rows(self, model, rows, query_vectors):
+        """Similarity of the given artifact rows to each query column"""
+        if model.scoring == 'dense':
+            return dense_scores(model.artifacts.lsa_codes[rows], model.artifacts.lsa_scales[rows], query_vectors)
+        return model.tfidf_matrix[rows] @ query_vectors
+    
+    @staticmethod
+    def _search_query(city, categories, traveler_type):
+        return f"{city} {' '.join(categories)} {traveler_type}"
+    
+    def _select_candidates(self, model, city, country, categories, traveler_type, top_n):
+        """Apply the city/category/traveler/distance filters.
+        
+        Returns (partition, local row positions within the partition).
+        """
+        # Look up the city partition instead of scanning the whole dataset
+        partition = model.city_index.get(city_key(city, country))
+        if partition is None:
+            return None, np.empty(0, dtype=np.int64)
+        
+        # Integer lookup table for categories and a bitwise test for traveler type
+        wanted_categories = np.zeros(len(model.category_codes), dtype=bool)
+        wanted_categories[[model.category_codes[c] for c in categories if c in model.category_codes]] = True
+        category_filter = wanted_categories[partition.columns['category_code']]
+        traveler_filter = (partition.columns['traveler_mask'] & traveler_bit(traveler_type)) != 0
+        
+        # Single pass: tier 0 = category + traveler match, 1 = category only, 2 = rest.
+        # Relaxation then just picks the tightest tier cutoff that still yields top_n.
+        tiers = np.full(len(partition), 2, dtype=np.int8)
+        tiers[category_filter] = 1
+        tiers[category_filter & traveler_filter] = 0
+        
+        tier_counts = np.cumsum(np.bincount(tiers, minlength=3))
+        max_tier = min(int(np.searchsorted(tier_counts, top_n)), 2)
+        
+        print(f"   🔍 Filtered POIs (with traveler): {tier_counts[0]}")
+        if max_tier >= 1:
+            print(f"   ⚠️ Not enough results, relaxing traveler filter...")
+            print(f"   🔍 Filtered POIs (without traveler): {tier_counts[1]}")
+        if max_tier >= 2:
+            print(f"   ⚠️ Still not enough, using all categories...")
+            print(f"   🔍 Filtered POIs (all categories): {tier_counts[2]}")
+        
+        selected = tiers <= max_tier
+        
+        # ✅ DISTANCE VALIDATION (in-radius mask precomputed per city)
+        if partition.in_radius is not None:
+            print(f"   🌍 Validating distance from city center...")
             
-            recommendations = []
-            for _, poi in top_pois.iterrows():
-                recommendations.append({
-                    'name': str(poi['name']),
-                    'category': str(poi['category']),
-                    'latitude': float(poi['latitude']),
-                    'longitude': float(poi['longitude']),
-                    'address': str(poi.get('address', '')),
-                    'phone': str(poi.get('phone', '')),
-                    'website': str(poi.get('website', '')),
-                    'rating': float(poi['rating']) if pd.notna(poi['rating']) else 0.0,
-                    'reviews': int(poi['reviews']) if pd.notna(poi['reviews']) else 0,
-                    'place_id': str(poi['place_id']) if pd.notna(poi.get('place_id')) else None,
-                    'photo_reference': str(poi['photo_reference']) if pd.notna(poi.get('photo_reference')) else None,
-                    'suitable_for': str(poi.get('suitable_for', '')),
-                    'city': str(poi['city']),
-                    'country': str(poi['country']),
-                    'types': str(poi.get('types', '')),
-                    'score': float(poi['combined_score'])
-                })
+            if selected.any():
+                distances = partition.distance_km[selected]
+                print(f"   📊 Distance range: {distances.min():.1f}km - {distances.max():.1f}km")
             
-            print(f"\n✅ Returning {len(recommendations)} recommendations")
-            return recommendations
+            selected = selected & partition.in_radius
             
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"   ✅ Filtered by distance (<{partition.radius_km:g}km): {int(selected.sum())} POIs")
+        else:
+            print(f"   ⚠️ No city center data for {city}, skipping distance validation")
+        
+        return partition, np.flatnonzero(selected)
+    
+    def _rank_candidates(self, model, partition, local_positions, similarity_scores, top_n, diversity=0.0,
+                         collaborative_scores=None):
+        """Pick the top_n candidates (see _top_candidates) and build their result dicts"""
+        top_rows, top_scores = self._top_candidates(
+            partition, local_positions, similarity_scores, top_n, diversity, collaborative_scores
+        )
+        return self._serialize_rows(model, top_rows, score=top_scores)
+    
+    def _top_candidates(self, partition, local_positions, similarity_scores, top_n, diversity=0.0,
+                        collaborative_scores=None):
+        """Blend similarity with rating/popularity; (artifact rows, scores) of the top_n, best first.
+        
+        collaborative_scores (0-1 per candidate, optional) adds the co-save signal.
+        With diversity > 0, the top_n are picked by MMR from a larger pool of the
+        best candidates, penalizing TF-IDF similarity to already picked POIs.
+        """
+        rating = partition.columns['rating'][local_positions]
+        reviews = partition.columns['reviews'][local_positions]
+        similarity_weight, rating_weight, popularity_weight = self.SCORE_WEIGHTS
+        
+        combined_scores = (
+            similarity_scores * similarity_weight +
+            (rating / 5.0) * rating_weight +
+            (np.log1p(reviews) / 10.0) * popularity_weight
+        )
+        if collaborative_scores is not None:
+            combined_scores = combined_scores + collaborative_scores * self.COOCCURRENCE_WEIGHT
+        
+        # Top-k without a full sort. Every candidate tying the k-th score is kept
+        # before ordering, so ties at the cut go to the earliest rows (as nlargest)
+        k = min(top_n, len(combined_scores))
+        pool_size = k
+        if diversity:
+            pool_size = min(len(combined_scores), max(k, min(k * self.MMR_POOL_FACTOR, self.MMR_MAX_POOL)))
+        top = np.arange(len(combined_scores))
+        if 0 < pool_size < len(combined_scores):
+            cutoff = -np.partition(-combined_scores, pool_size - 1)[pool_size - 1]
+            top = np.flatnonzero(combined_scores >= cutoff)
+        top = top[np.lexsort((top, -combined_scores[top]))][:pool_size]
+        
+        if diversity and k > 1:
+            # One sparse product gives every candidate-candidate cosine in the pool
+            pool_matrix = partition.matrix[local_positions[top]]
+            pair_similarity = (pool_matrix @ pool_matrix.T).toarray()
+            top = top[mmr_select(combined_scores[top], pair_similarity, k, diversity)]
+        else:
+            top = top[:k]
+        
+        return partition.rows[local_positions[top]], combined_scores[top]
+    
+    def _serialize_rows(self, model, rows, **extra_fields):
+        """Build response dicts for artifact rows, plus per-row extra fields (NumPy arrays)"""
+        # Gather each field once as a typed column; defaults were resolved at train time
+        fields = {}
+        for name, default in self.RESULT_FIELDS:
+            column = model.pois.get(name)
+            if column is None:
+                fields[name] = [default] * len(rows)
+            else:
+                values = column[rows]
+                if values.dtype == np.float32:
+                    # Stored as float32; round so the payload doesn't show float32 noise
+                    values = np.round(values.astype(np.float64), 6)
+                fields[name] = values.tolist()
+        for name, values in extra_fields.items():
+            fields[name] = np.asarray(values).tolist()
+        
+        names = list(fields)
+        return [dict(zip(names, values)) for values in zip(*fields.values())]
+    
+    # ========== LOCAL NEARBY SEARCH ==========
+    def nearby(self, lat, lng, radius_km=5.0, limit=20, categories=None, traveler_type=None):
+        """POIs within radius_km of (lat, lng), nearest first, from the in-memory spatial grid.
+        
+        Optional category list and traveler type filter the matches the same way
+        get_recommendations does. Each result carries a distance_km field.
+        """
+        model = self.model
+        rows, distances = model.spatial_index.query_radius(float(lat), float(lng), float(radius_km))
+        
+        keep = np.ones(len(rows), dtype=bool)
+        if categories:
+            wanted_categories = np.zeros(len(model.category_codes), dtype=bool)
+            wanted_categories[[model.category_codes[c] for c in categories if c in model.category_codes]] = True
+            keep &= wanted_categories[model.pois['category_code'][rows]]
+        if traveler_type:
+            keep &= (model.pois['traveler_mask'][rows] & traveler_bit(traveler_type)) != 0
+        
+        rows, distances = rows[keep][:limit], distances[keep][:limit]
+        return self._serialize_rows(model, rows, distance_km=np.round(distances, 3))
+
+
+    # ========== SIMILAR PLACES ==========
+    def similar_places(self, poi_id, limit=10):
+        """Precomputed similar places (same city) for a POI (place_id or artifact row).
+        
+        Reads one row of the artifact's neighbour graph, so the cost is O(k).
+        Each result carries a similarity score and distance_km from the POI.
+        Unknown place_ids raise KeyError.
+        """
+        model = self.model
+        indices = model.artifacts.neighbor_indices
+        if indices is None:
             return []
+        
+        row = self._resolve_rows(model, [poi_id])[0]
+        neighbors = np.asarray(indices[row][:max(int(limit), 0)])
+        keep = neighbors >= 0
+        rows = neighbors[keep].astype(np.int64)
+        scores = np.round(np.asarray(model.artifacts.neighbor_scores[row][:len(keep)], dtype=np.float64)[keep], 4)
+        
+        distances = haversine_km(
+            model.pois['latitude'][row], model.pois['longitude'][row],
+            model.pois['latitude'][rows], model.pois['longitude'][rows]
+        )
+        return self._serialize_rows(model, rows, score=scores, distance_km=np.round(distances, 3))
+    
+    
+    # ========== POI DISTANCES ==========
+    def distance_between(self, poi_a, poi_b):
+        """Great-circle km between two POIs (place_id or artifact row)"""
+        return float(self.distance_matrix([poi_a, poi_b])[0, 1])
+    
+    def distance_matrix(self, poi_ids):
+        """Pairwise km between POIs (place_ids or artifact rows) as a float32 matrix.
+        
+        Pairs within the same city are read from the precomputed float16
+        matrices; other pairs (or cities too large to precompute) use haversine.
+        Unknown place_ids raise KeyError.
+        """
+        model = self.model
+        rows = self._resolve_rows(model, poi_ids)
+        n = len(rows)
+        
+        lat = np.asarray(model.pois['latitude'][rows], dtype=np.float64)
+        lon = np.asarray(model.pois['longitude'][rows], dtype=np.float64)
+        result = np.zeros((n, n), dtype=np.float32)
+        
+        part_of = np.searchsorted(model.partition_starts, rows, side='right') - 1
+        i, j = np.triu_indices(n, k=1)
+        same_city = (part_of[i] == part_of[j]) & (rows[i] != rows[j])
+        
+        values = np.zeros(len(i), dtype=np.float32)
+        precomputed = np.zeros(len(i), dtype=bool)
+        for p in np.unique(part_of[i[same_city]]):
+            partition = model.partitions[p]
+            if partition.distances is None:
+                continue
+            pairs = same_city & (part_of[i] == p)
+            start = partition.rows[0]
+            positions = condensed_index(len(partition), rows[i[pairs]] - start, rows[j[pairs]] - start)
+            values[pairs] = partition.distances[positions]
+            precomputed |= pairs
+        
+        rest = ~precomputed
+        values[rest] = haversine_km(lat[i[rest]], lon[i[rest]], lat[j[rest]], lon[j[rest]])
+        
+        result[i, j] = values
+        result[j, i] = values
+        return result
+    
+    @staticmethod
+    def _resolve_rows(model, poi_ids):
+        """Artifact rows for place_ids or row numbers; unknown place_ids raise KeyError"""
+        rows = np.array(
+            [int(poi_id) if isinstance(poi_id, (int, np.integer)) else -1 for poi_id in poi_ids], dtype=np.int64
+        )
+        named = [i for i, poi_id in enumerate(poi_ids) if not isinstance(poi_id, (int, np.integer))]
+        if named:
+            rows[named] = model.lookup_place_rows([poi_ids[i] for i in named])
+            missing = [poi_ids[i] for i in named if rows[i] < 0]
+            if missing:
+                raise KeyError(missing[0])
+        return rows
+    
+    # ========== DAY PLANNER ==========
+    def plan_itinerary(self, city, country, categories, traveler_type='solo', nights=3, activities_per_day=3):
+        """Recommend activities and arrange them into nights + 1 day plans.
+        
+        Activities are split into geographically compact days and each day is
+        ordered into a short walking/driving route, so the client doesn't need
+        to order stops or call the routing API pair by pair.
+        """
+        n_days = max(int(nights), 0) + 1
+        top_n = max(n_days * int(activities_per_day), 1)
+        
+        recommendations = self.get_recommendations(
+            city, country, categories, traveler_type=traveler_type, nights=nights, top_n=top_n
+        )
+        days = plan_days(recommendations, n_days)
+        
+        print(f"🗓️ Planned {len(recommendations)} activities into {len(days)} days")
+        return {
+            'city': city,
+            'country': country,
+            'nights': int(nights),
+            'days': days
+        }
+
+
+# ========== SHARED INSTANCE ==========
+# One recommender per process, loaded on first use or by warmup_recommender()
+_recommender = None
+_recommender_error = None
+_recommender_lock = threading.Lock()
+_warmup_queries = None  # set by warmup_recommender(), warmed before the recommender is published
+
+# Recommender inherited by forked trip-pool workers
+_trip_pool_recommender = None
+
+
+def _init_trip_pool_worker():
+    """Fresh locks/cache in a forked worker; other threads' locks don't survive fork.
+    
+    Query logging is off in workers: the parent logs each leg before fanning out.
+    """
+    recommender = _trip_pool_recommender
+    recommender.cache = ResultCache(recommender.CACHE_MAX_ENTRIES, recommender.CACHE_TTL_SECONDS)
+    recommender.query_log_path = None
+    recommender._query_counts = {}
+    recommender.model._place_rows_lock = threading.Lock()
+
+
+def _trip_pool_batch(queries):
+    return _trip_pool_recommender.get_recommendations_batch(queries)
+
 
+def get_recommender(wait=True):
+    """Return the process-wide recommender, loading it on first call (None if loading failed).
+    
+    With wait=False, return None instead of loading/waiting if it isn't ready yet.
+    """
+    global _recommender, _recommender_error
+    
+    if _recommender is not None or not wait:
+        return _recommender
+    
+    with _recommender_lock:
+        if _recommender is None:
+            try:
+                recommender = ItineraryRecommender()
+                # Publish only once the popular queries are warm, so readiness means fast
+                recommender.warm_cache(_warmup_queries)
+                _recommender = recommender
+                _recommender_error = None
+                print("✅ Recommender system initialized successfully\n")
+            except Exception as e:
+                print(f"❌ Failed to initialize recommender: {e}")
+                _recommender_error = str(e)
+    
+    return _recommender
+
+
+def warmup_recommender(background=False, queries=None):
+    """Load the shared recommender and warm its cache, optionally in a background thread.
+    
+    queries: popular get_recommendations argument dicts to precompute and pin.
+    """
+    global _warmup_queries
+    if queries is not None:
+        _warmup_queries = list(queries)
+    if background:
+        threading.Thread(target=get_recommender, name='recommender-warmup', daemon=True).start()
+        return None
+    return get_recommender()
 
-# ========== GLOBAL INSTANCE ==========
-try:
-    recommender = ItineraryRecommender()
-    print("✅ Recommender system initialized successfully\n")
-except Exception as e:
-    print(f"❌ Failed to initialize recommender: {e}")
-    recommender = None
+
+def recommender_status():
+    """Readiness info for health checks"""
+    return {
+        'ready': _recommender is not None,
+        'error': _recommender_error,
+        'version': _recommender.version if _recommender is not None else None,
+        'scoring': _recommender.model.scoring if _recommender is not None else None,
+        'cache': _recommender.cache.stats() if _recommender is not None else None,
+        'cooccurrence': (
+            _recommender.cooccurrence.version
+            if _recommender is not None and _recommender.cooccurrence is not None else None
+        ),
+        'warmup': dict(_recommender.warmup_stats) if _recommender is not None else None,
+        'reload': dict(_recommender.reload_stats) if _recommender is not None else None
+    }
+
+
+def start_model_watcher(interval_seconds=30):
+    """Poll models/artifacts/CURRENT and hot-reload the shared recommender when it changes"""
+    if not interval_seconds or interval_seconds <= 0:
+        return None
+    
+    def watch():
+        while True:
+            time.sleep(interval_seconds)
+            recommender = _recommender
+            if recommender is None:
+                continue
+            try:
+                recommender.check_for_update()
+            except Exception as e:
+                print(f"⚠️ Model watcher error: {e}")
+    
+    thread = threading.Thread(target=watch, name='recommender-model-watcher', daemon=True)
+    thread.start()
+    print(f"👀 Watching for new recommender models every {interval_seconds}s")
+    return thread
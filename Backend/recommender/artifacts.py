@@ -0,0 +1,592 @@
+# ========== artifacts.py ==========
+"""Memory-mappable model artifacts for the itinerary recommender.
+
+Layout of one trained version (models/artifacts/<version>/):
+
+    manifest.json          version, POI count, columns, partitions, vectorizer settings
+                           (including the resolved stop-word list)
+    vocabulary.json        TF-IDF term -> column index
+    idf.npy                TF-IDF idf weights
+    tfidf_data.npy         CSR data    (float32)
+    tfidf_indices.npy      CSR indices (int32)
+    tfidf_indptr.npy       CSR indptr  (int64)
+    columns/<name>.npy     numeric POI columns (float32 coordinates/rating, int32 reviews)
+    columns/<name>.offsets.npy / .utf8.npy / .nulls.npy
+                           free-text POI columns (one UTF-8 blob plus offsets)
+    columns/<name>.codes.npy / .values.json
+                           low-cardinality POI columns, dictionary-encoded
+    city_distance_km.npy   float32 km from each POI to its city's robust center
+    in_radius.npy          bool, POI lies within its city's coverage radius
+                           (centers and radii per partition in manifest city_geometry)
+    distances.npy          float16 pairwise haversine km per city partition, condensed
+                           upper triangles back to back (see manifest distance_offsets)
+    neighbors_indices.npy  top-k similar places per POI within its city (int32 rows, -1 = none)
+    neighbors_scores.npy   ... and their blended text/proximity scores (float16)
+    place_id_index.npy     every non-empty place_id, sorted (fixed-width UTF-8 bytes) ...
+    place_id_rows.npy      ... and its artifact row (int64), for np.searchsorted lookups
+    spatial_order.npy      POI rows sorted by lat/lon grid cell (int32) ...
+    spatial_cell_keys.npy  ... the distinct cell ids (int64) and where each cell starts
+    spatial_cell_starts.npy  in spatial_order (see geo.SpatialGrid, manifest spatial_grid)
+    lsa_components.npy     optional TruncatedSVD components (float32, k x terms)
+    lsa_codes.npy          optional int8 LSA embedding per POI (n x k) ...
+    lsa_scales.npy         ... and its float32 scale (codes * scale ~= unit embedding)
+
+models/artifacts/CURRENT names the version the recommender should open.
+Every array is opened with np.load(mmap_mode='r'), so worker processes share
+pages through the OS page cache instead of each unpickling a private copy.
+POIs are stored sorted by (city, country), which makes every city partition a
+contiguous row range that can be sliced without copying.
+
+Only the columns in SERVING_SCHEMA are written; training-only columns such as
+combined_text and description stay out of the artifact. The target for the
+serving columns is MEMORY_PER_POI_TARGET bytes per POI (TF-IDF rows excluded,
+they add roughly 8 bytes per non-zero term); train_recommender.py reports the
+measured figure for every build.
+"""
+import os
+import sys
+import json
+import shutil
+from datetime import datetime
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from recommender.encoding import city_key
+from recommender.geo import condensed_distances, city_center_radius, SpatialGrid
+from recommender.tfidf import QueryVectorizer
+from recommender.embeddings import quantize_rows
+from recommender.neighbors import build_neighbor_graph
+
+
+ARTIFACT_FORMAT = 2
+ARTIFACTS_DIRNAME = 'artifacts'
+CURRENT_FILE = 'CURRENT'
+
+# Serving columns and how they are stored: 'string' (UTF-8 blob), 'categorical'
+# (dictionary-encoded) or a NumPy dtype for numeric columns
+SERVING_SCHEMA = {
+    'name': 'string',
+    'address': 'string',
+    'phone': 'string',
+    'website': 'string',
+    'place_id': 'string',
+    'photo_reference': 'string',
+    'category': 'categorical',
+    'city': 'categorical',
+    'country': 'categorical',
+    'suitable_for': 'categorical',
+    'types': 'categorical',
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'rating': 'float32',
+    'reviews': 'int32',
+    'category_code': 'int16',
+    'traveler_mask': 'uint8',
+}
+
+# Bytes per POI the serving columns should stay under (TF-IDF excluded)
+MEMORY_PER_POI_TARGET = 512
+
+# Cities up to this many POIs get a precomputed distance matrix (~n^2 bytes as
+# condensed float16); bigger cities fall back to computing haversine on demand
+DISTANCE_MATRIX_MAX_POIS = 5000
+
+# Per-city coverage radius bounds (see geo.city_center_radius)
+CITY_RADIUS_MIN_KM = 5.0
+CITY_RADIUS_MAX_KM = 80.0
+
+# Cell size (degrees) of the lat/lon grid used for nearby-POI queries
+SPATIAL_GRID_CELL_DEG = 0.05
+
+# "Similar places" graph: neighbours kept per POI and the weight/length scale of
+# the geographic proximity term blended with TF-IDF cosine (see neighbors.py)
+SIMILAR_PLACES_K = 10
+SIMILAR_PLACES_GEO_WEIGHT = 0.3
+SIMILAR_PLACES_GEO_SCALE_KM = 2.0
+
+# TfidfVectorizer settings needed to transform queries at serve time (see tfidf.QueryVectorizer)
+VECTORIZER_PARAMS = ('lowercase', 'stop_words', 'ngram_range', 'token_pattern',
+                     'norm', 'use_idf', 'smooth_idf', 'sublinear_tf', 'binary')
+
+
+class StringColumn:
+    """Read-only string column stored as a UTF-8 blob plus row offsets"""
+
+    def __init__(self, offsets, blob, nulls=None):
+        self.offsets = offsets  # uint32 (int64 for blobs >= 4 GB), len(column) + 1
+        self.blob = blob        # uint8, concatenated UTF-8 bytes
+        self.nulls = nulls      # bool mask of missing values (None if there are none)
+
+    @classmethod
+    def from_values(cls, values):
+        """Encode a sequence of strings (None/NaN become nulls)"""
+        nulls = np.zeros(len(values), dtype=bool)
+        encoded = []
+        for i, value in enumerate(values):
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                nulls[i] = True
+                encoded.append(b'')
+            else:
+                encoded.append(str(value).encode('utf-8'))
+
+        lengths = np.array([len(b) for b in encoded], dtype=np.int64)
+        offset_dtype = np.uint32 if lengths.sum() < 2 ** 32 else np.int64
+        offsets = np.zeros(len(values) + 1, dtype=offset_dtype)
+        np.cumsum(lengths, out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+        return cls(offsets, blob, nulls if nulls.any() else None)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def value(self, i):
+        """Decode a single row"""
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        return bytes(self.blob[int(self.offsets[i]):int(self.offsets[i + 1])]).decode('utf-8')
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.value(key)
+        if isinstance(key, slice):
+            key = range(*key.indices(len(self)))
+        return np.array([self.value(i) for i in key], dtype=object)
+
+    def save(self, path_prefix):
+        np.save(f'{path_prefix}.offsets.npy', self.offsets)
+        np.save(f'{path_prefix}.utf8.npy', self.blob)
+        if self.nulls is not None:
+            np.save(f'{path_prefix}.nulls.npy', self.nulls)
+
+    @classmethod
+    def load(cls, path_prefix):
+        nulls_path = f'{path_prefix}.nulls.npy'
+        return cls(
+            np.load(f'{path_prefix}.offsets.npy', mmap_mode='r'),
+            np.load(f'{path_prefix}.utf8.npy', mmap_mode='r'),
+            np.load(nulls_path, mmap_mode='r') if os.path.exists(nulls_path) else None
+        )
+
+
+class CategoricalColumn:
+    """Read-only dictionary-encoded column: small integer codes into interned strings"""
+
+    def __init__(self, codes, values):
+        self.codes = codes  # int16/int32 code per row, -1 for missing
+        # Interned so every row with the same value shares one str object;
+        # the trailing None is what code -1 resolves to
+        self.values = np.array([sys.intern(v) for v in values] + [None], dtype=object)
+
+    @classmethod
+    def encode(cls, values):
+        """Return (codes, distinct values) for a sequence of strings"""
+        missing = [v is None or (isinstance(v, float) and np.isnan(v)) for v in values]
+        distinct = sorted({str(v) for v, m in zip(values, missing) if not m})
+        lookup = {v: code for code, v in enumerate(distinct)}
+        code_dtype = np.int16 if len(distinct) < 2 ** 15 else np.int32
+        codes = np.fromiter(
+            (-1 if m else lookup[str(v)] for v, m in zip(values, missing)),
+            dtype=code_dtype, count=len(values)
+        )
+        return codes, distinct
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.values[self.codes[key]]
+        return self.values[np.asarray(self.codes[key])]
+
+    @classmethod
+    def load(cls, path_prefix):
+        with open(f'{path_prefix}.values.json', encoding='utf-8') as f:
+            values = json.load(f)
+        return cls(np.load(f'{path_prefix}.codes.npy', mmap_mode='r'), values)
+
+
+class ModelArtifacts:
+    """One trained model version, opened memory-mapped"""
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get('format') not in (1, ARTIFACT_FORMAT):
+            raise ValueError(f"Unsupported artifact format {self.manifest.get('format')} in {path}")
+
+        self.version = self.manifest['version']
+        self.n_pois = self.manifest['n_pois']
+        self.categories = self.manifest['categories']
+        self.partitions = [tuple(p) for p in self.manifest['partitions']]
+
+        # Offset of each partition's condensed distance matrix (None if not precomputed)
+        self.distance_offsets = self.manifest.get('distance_offsets') or [None] * len(self.partitions)
+        distances_path = os.path.join(path, 'distances.npy')
+        self.distances = np.load(distances_path, mmap_mode='r') if os.path.exists(distances_path) else None
+
+        with open(os.path.join(path, 'vocabulary.json'), encoding='utf-8') as f:
+            self.vocabulary = json.load(f)
+        self.idf = self._load('idf.npy')
+
+        self.tfidf_matrix = csr_matrix(
+            (self._load('tfidf_data.npy'), self._load('tfidf_indices.npy'), self._load('tfidf_indptr.npy')),
+            shape=(self.n_pois, len(self.vocabulary))
+        )
+
+        # City centers/radii and per-POI in-radius masks (absent in older artifacts)
+        self.city_geometry = self.manifest.get('city_geometry')
+        self.city_distance_km = self.in_radius = None
+        if self.city_geometry is not None:
+            self.city_distance_km = self._load('city_distance_km.npy')
+            self.in_radius = self._load('in_radius.npy')
+
+        # Similar-places graph (absent in artifacts written before it existed)
+        self.neighbor_indices = self.neighbor_scores = None
+        if self.manifest.get('neighbors'):
+            self.neighbor_indices = self._load('neighbors_indices.npy')
+            self.neighbor_scores = self._load('neighbors_scores.npy')
+
+        # Sorted place_id -> row index (absent in artifacts written before it existed)
+        self.place_id_index = self.place_id_rows = None
+        if self.manifest.get('place_id_index'):
+            self.place_id_index = self._load('place_id_index.npy')
+            self.place_id_rows = self._load('place_id_rows.npy')
+
+        # Spatial grid cell index (absent in artifacts written before it existed)
+        self.spatial_grid = self.manifest.get('spatial_grid')
+        self.spatial_order = self.spatial_cell_keys = self.spatial_cell_starts = None
+        if self.spatial_grid:
+            self.spatial_order = self._load('spatial_order.npy')
+            self.spatial_cell_keys = self._load('spatial_cell_keys.npy')
+            self.spatial_cell_starts = self._load('spatial_cell_starts.npy')
+
+        # Optional LSA embeddings: components (k x terms), int8 codes (n x k), per-row scales
+        self.lsa_components = self.lsa_codes = self.lsa_scales = None
+        if self.manifest.get('lsa'):
+            self.lsa_components = self._load('lsa_components.npy')
+            self.lsa_codes = self._load('lsa_codes.npy')
+            self.lsa_scales = self._load('lsa_scales.npy')
+
+        self.columns = {}
+        for name, kind in self.manifest['columns'].items():
+            prefix = os.path.join(path, 'columns', name)
+            if kind == 'string':
+                self.columns[name] = StringColumn.load(prefix)
+            elif kind == 'categorical':
+                self.columns[name] = CategoricalColumn.load(prefix)
+            else:
+                self.columns[name] = np.load(f'{prefix}.npy', mmap_mode='r')
+
+    def _load(self, filename):
+        return np.load(os.path.join(self.path, filename), mmap_mode='r')
+
+    def lookup_place_ids(self, place_ids):
+        """Artifact row per place_id (-1 if unknown) by binary search of the mapped index.
+
+        Needs place_id_index; with duplicate place_ids the last row wins.
+        """
+        rows = np.full(len(place_ids), -1, dtype=np.int64)
+        wanted = [i for i, pid in enumerate(place_ids) if isinstance(pid, str) and pid]
+        if not wanted or len(self.place_id_index) == 0:
+            return rows
+        keys = np.array([place_ids[i].encode('utf-8') for i in wanted], dtype=bytes)
+        slots = np.searchsorted(self.place_id_index, keys, side='right') - 1
+        found = slots >= 0
+        found[found] = self.place_id_index[slots[found]] == keys[found]
+        rows[np.array(wanted)[found]] = self.place_id_rows[slots[found]]
+        return rows
+
+    def matrix_rows(self, start, stop):
+        """TF-IDF rows [start, stop) as a CSR view over the mapped arrays (no data copy)"""
+        indptr = self.tfidf_matrix.indptr
+        first, last = indptr[start], indptr[stop]
+        return csr_matrix(
+            (self.tfidf_matrix.data[first:last], self.tfidf_matrix.indices[first:last],
+             np.asarray(indptr[start:stop + 1]) - first),
+            shape=(stop - start, self.tfidf_matrix.shape[1])
+        )
+
+    def partition_distances(self, index):
+        """Condensed float16 distance matrix of partition `index` (a mapped view), or None"""
+        offset = self.distance_offsets[index]
+        if offset is None or self.distances is None:
+            return None
+        _, _, start, stop = self.partitions[index]
+        n = stop - start
+        return self.distances[offset:offset + n * (n - 1) // 2]
+
+    def build_vectorizer(self):
+        """Query vectorizer rebuilt from the stored vocabulary, idf and settings"""
+        params = dict(self.manifest['vectorizer'])
+        stop_words = params.pop('stop_words')
+        if 'stop_word_list' in self.manifest:
+            stop_words = self.manifest['stop_word_list']
+        elif stop_words == 'english':
+            # Artifacts written before the resolved list was exported
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            stop_words = ENGLISH_STOP_WORDS
+        params.pop('smooth_idf', None)  # only matters when fitting the idf
+        params['ngram_range'] = tuple(params['ngram_range'])
+        return QueryVectorizer(self.vocabulary, self.idf, stop_words=stop_words, **params)
+
+
+def artifacts_root(models_dir):
+    return os.path.join(models_dir, ARTIFACTS_DIRNAME)
+
+
+def current_version(models_dir):
+    """Version named by models/artifacts/CURRENT, or None if nothing was published"""
+    try:
+        with open(os.path.join(artifacts_root(models_dir), CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_path(models_dir, version):
+    """Directory of an existing artifact version.
+
+    Only plain directory names under models/artifacts/ are accepted, so a
+    caller-supplied version can't point anywhere else (e.g. '../..').
+    """
+    if (not isinstance(version, str) or not version or version != os.path.basename(version)
+            or version.startswith('.') or version.endswith('.tmp') or version == CURRENT_FILE):
+        raise ValueError(f"Invalid artifact version: {version!r}")
+    path = os.path.join(artifacts_root(models_dir), version)
+    if not os.path.isfile(os.path.join(path, 'manifest.json')):
+        raise FileNotFoundError(f"No artifact version {version} in {artifacts_root(models_dir)}")
+    return path
+
+
+def open_artifacts(models_dir, version=None):
+    """Open the given (default: current) artifact version"""
+    version = version or current_version(models_dir)
+    if version is None:
+        raise FileNotFoundError(f"No published model artifacts in {artifacts_root(models_dir)}")
+    return ModelArtifacts(version_path(models_dir, version))
+
+
+def publish_version(models_dir, version):
+    """Point models/artifacts/CURRENT at an existing version, atomically"""
+    version_path(models_dir, version)
+    root = artifacts_root(models_dir)
+    current_tmp = os.path.join(root, f'{CURRENT_FILE}.{os.getpid()}.tmp')
+    with open(current_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(root, CURRENT_FILE))
+
+
+def write_artifacts(models_dir, df, tfidf_vectorizer, tfidf_matrix, categories, version=None,
+                    lsa_components=None, lsa_embeddings=None):
+    """Write a new artifact version from a trained DataFrame/vectorizer/matrix and publish it.
+
+    `categories` is the name list that df['category_code'] indexes into.
+    `lsa_components` / `lsa_embeddings` (optional, from TruncatedSVD) add the
+    int8 dense embeddings used by the recommender's dense scoring mode.
+
+    Returns the path of the written version directory.
+    """
+    root = artifacts_root(models_dir)
+    os.makedirs(root, exist_ok=True)
+
+    version = version or datetime.now().strftime('%Y%m%d-%H%M%S')
+    final_path = os.path.join(root, version)
+    if os.path.exists(final_path):
+        raise FileExistsError(f"Artifact version already exists: {final_path}")
+
+    tmp_path = final_path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_path, 'columns'))
+
+    # Sort POIs by partition key so each city is a contiguous row range
+    keys = [city_key(city, country) for city, country in zip(df['city'], df['country'])]
+    order = np.array(sorted(range(len(keys)), key=keys.__getitem__), dtype=np.int64)
+    df = df.iloc[order].reset_index(drop=True)
+    tfidf_matrix = csr_matrix(tfidf_matrix)[order]
+    keys = [keys[i] for i in order]
+    if lsa_embeddings is not None:
+        lsa_embeddings = np.asarray(lsa_embeddings)[order]
+
+    partitions = []
+    start = 0
+    for i in range(1, len(keys) + 1):
+        if i == len(keys) or keys[i] != keys[start]:
+            partitions.append([keys[start][0], keys[start][1], start, i])
+            start = i
+
+    np.save(os.path.join(tmp_path, 'tfidf_data.npy'), tfidf_matrix.data.astype(np.float32))
+    np.save(os.path.join(tmp_path, 'tfidf_indices.npy'), tfidf_matrix.indices.astype(np.int32))
+    np.save(os.path.join(tmp_path, 'tfidf_indptr.npy'), tfidf_matrix.indptr.astype(np.int64))
+    np.save(os.path.join(tmp_path, 'idf.npy'), tfidf_vectorizer.idf_.astype(np.float64))
+
+    vocabulary = {term: int(index) for term, index in tfidf_vectorizer.vocabulary_.items()}
+    with open(os.path.join(tmp_path, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+        json.dump(vocabulary, f, ensure_ascii=False)
+
+    # Serving columns only, in their compact storage form
+    columns = {}
+    for name, kind in SERVING_SCHEMA.items():
+        if name not in df.columns:
+            continue
+        prefix = os.path.join(tmp_path, 'columns', name)
+        values = df[name].to_numpy()
+        if kind == 'string':
+            StringColumn.from_values(values).save(prefix)
+        elif kind == 'categorical':
+            codes, distinct = CategoricalColumn.encode(values)
+            np.save(f'{prefix}.codes.npy', codes)
+            with open(f'{prefix}.values.json', 'w', encoding='utf-8') as f:
+                json.dump(distinct, f, ensure_ascii=False)
+        else:
+            np.save(f'{prefix}.npy', values.astype(kind))
+        columns[name] = kind if kind in ('string', 'categorical') else 'numeric'
+
+    _write_place_id_index(tmp_path, df['place_id'].to_numpy())
+    _write_spatial_grid(tmp_path, df)
+    distance_offsets = _write_distance_matrices(tmp_path, df, partitions)
+    city_geometry = _write_city_geometry(tmp_path, df, partitions)
+
+    neighbor_indices, neighbor_scores = build_neighbor_graph(
+        tfidf_matrix, df['latitude'].to_numpy(), df['longitude'].to_numpy(), partitions,
+        k=SIMILAR_PLACES_K, geo_weight=SIMILAR_PLACES_GEO_WEIGHT, geo_scale_km=SIMILAR_PLACES_GEO_SCALE_KM
+    )
+    np.save(os.path.join(tmp_path, 'neighbors_indices.npy'), neighbor_indices)
+    np.save(os.path.join(tmp_path, 'neighbors_scores.npy'), neighbor_scores)
+
+    lsa = None
+    if lsa_components is not None and lsa_embeddings is not None:
+        codes, scales = quantize_rows(lsa_embeddings)
+        np.save(os.path.join(tmp_path, 'lsa_components.npy'), np.asarray(lsa_components, dtype=np.float32))
+        np.save(os.path.join(tmp_path, 'lsa_codes.npy'), codes)
+        np.save(os.path.join(tmp_path, 'lsa_scales.npy'), scales)
+        lsa = {'components': int(codes.shape[1])}
+
+    column_bytes = _directory_size(os.path.join(tmp_path, 'columns'))
+    tfidf_bytes = sum(
+        os.path.getsize(os.path.join(tmp_path, f))
+        for f in ('tfidf_data.npy', 'tfidf_indices.npy', 'tfidf_indptr.npy')
+    )
+
+    vectorizer_params = tfidf_vectorizer.get_params()
+    manifest = {
+        'format': ARTIFACT_FORMAT,
+        'version': version,
+        'created': datetime.now().isoformat(),
+        'n_pois': int(len(df)),
+        'columns': columns,
+        'bytes_per_poi': {
+            'columns': round(column_bytes / max(len(df), 1), 1),
+            'tfidf': round(tfidf_bytes / max(len(df), 1), 1),
+            'lsa': round((codes.nbytes + scales.nbytes) / max(len(df), 1), 1) if lsa else None,
+            'target': MEMORY_PER_POI_TARGET
+        },
+        'categories': list(categories),
+        'partitions': partitions,
+        'distance_offsets': distance_offsets,
+        'city_geometry': city_geometry,
+        'lsa': lsa,
+        'place_id_index': True,
+        'spatial_grid': {'cell_deg': SPATIAL_GRID_CELL_DEG},
+        'neighbors': {
+            'k': SIMILAR_PLACES_K,
+            'geo_weight': SIMILAR_PLACES_GEO_WEIGHT,
+            'geo_scale_km': SIMILAR_PLACES_GEO_SCALE_KM
+        },
+        'vectorizer': {p: vectorizer_params[p] for p in VECTORIZER_PARAMS},
+        'stop_word_list': sorted(tfidf_vectorizer.get_stop_words() or ()),
+    }
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # Publish: move the finished directory into place, then flip CURRENT atomically
+    os.replace(tmp_path, final_path)
+    publish_version(models_dir, version)
+
+    return final_path
+
+
+def _write_place_id_index(path, place_ids):
+    """Write sorted place_ids and their rows, so lookups binary-search a mapped array"""
+    rows = np.array(
+        [i for i, pid in enumerate(place_ids) if isinstance(pid, str) and pid], dtype=np.int64
+    )
+    keys = np.array([place_ids[i].encode('utf-8') for i in rows], dtype=bytes)
+    if len(keys) == 0:
+        keys = np.zeros(0, dtype='S1')
+    order = np.argsort(keys, kind='stable')  # equal ids keep row order
+    np.save(os.path.join(path, 'place_id_index.npy'), keys[order])
+    np.save(os.path.join(path, 'place_id_rows.npy'), rows[order])
+
+
+def _write_spatial_grid(path, df):
+    """Write the SpatialGrid cell index, built from the stored float32 coordinates"""
+    grid = SpatialGrid(
+        df['latitude'].to_numpy().astype(np.float32), df['longitude'].to_numpy().astype(np.float32),
+        SPATIAL_GRID_CELL_DEG
+    )
+    np.save(os.path.join(path, 'spatial_order.npy'), grid.order)
+    np.save(os.path.join(path, 'spatial_cell_keys.npy'), grid.cell_keys)
+    np.save(os.path.join(path, 'spatial_cell_starts.npy'), grid.cell_starts)
+
+
+def _write_city_geometry(path, df, partitions):
+    """Write per-POI distance to city center and in-radius mask; return [lat, lon, radius_km] per partition"""
+    latitudes = df['latitude'].to_numpy(dtype=np.float64)
+    longitudes = df['longitude'].to_numpy(dtype=np.float64)
+    distance_km = np.zeros(len(df), dtype=np.float32)
+    in_radius = np.zeros(len(df), dtype=bool)
+
+    geometry = []
+    for _, _, start, stop in partitions:
+        center_lat, center_lon, radius_km, distances = city_center_radius(
+            latitudes[start:stop], longitudes[start:stop], CITY_RADIUS_MIN_KM, CITY_RADIUS_MAX_KM
+        )
+        distance_km[start:stop] = distances
+        in_radius[start:stop] = distances <= radius_km
+        geometry.append([round(center_lat, 6), round(center_lon, 6), round(radius_km, 3)])
+
+    np.save(os.path.join(path, 'city_distance_km.npy'), distance_km)
+    np.save(os.path.join(path, 'in_radius.npy'), in_radius)
+    return geometry
+
+
+def _write_distance_matrices(path, df, partitions):
+    """Write condensed per-partition distance matrices into one float16 file"""
+    latitudes = df['latitude'].to_numpy(dtype=np.float64)
+    longitudes = df['longitude'].to_numpy(dtype=np.float64)
+
+    offsets = []
+    total = 0
+    for _, _, start, stop in partitions:
+        n = stop - start
+        if n <= DISTANCE_MATRIX_MAX_POIS:
+            offsets.append(total)
+            total += n * (n - 1) // 2
+        else:
+            offsets.append(None)
+
+    distances = np.lib.format.open_memmap(
+        os.path.join(path, 'distances.npy'), mode='w+', dtype=np.float16, shape=(total,)
+    )
+    for (_, _, start, stop), offset in zip(partitions, offsets):
+        if offset is None:
+            continue
+        n = stop - start
+        condensed_distances(latitudes[start:stop], longitudes[start:stop],
+                            distances[offset:offset + n * (n - 1) // 2])
+    distances.flush()
+    del distances
+
+    return offsets
+
+
+def _directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path) for name in files
+    )
@@ -0,0 +1,292 @@
+# ========== benchmark_recommender.py ==========
+"""Scaling benchmark for ItineraryRecommender on synthetic POI datasets.
+
+For each dataset size a CSV shaped like data/pois_84_cities.csv is generated
+(84 cities with skewed sizes), trained with train_recommender_model() and
+loaded in a fresh process, which reports load time, resident memory and
+uncached get_recommendations latency (p50/p95/p99) per city-size bucket
+and top_n. Results go to a JSON file so runs can be diffed between
+versions; it is rewritten after every size, so a partial run still leaves
+the sizes that finished.
+
+    python benchmark_recommender.py [sizes] [n_queries] [output]
+    python benchmark_recommender.py 10000,100000,1000000 200 benchmark_results.json
+
+Training the 1M dataset (mostly the similar-places graph) takes a while.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender.benchmarking import sample_queries, run_queries, warm_up, latency_summary
+from recommender.encoding import TRAVELER_TYPES
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+TOP_N_VALUES = (10, 40, 100)
+N_CITIES = 84
+
+# Same category set and traveler tags as download_google_pois_free.py
+CATEGORIES = [
+    'restaurant', 'cafe', 'tourist_attraction', 'museum', 'shopping_mall', 'park', 'bar',
+    'art_gallery', 'library', 'theater',
+    'church', 'synagogue', 'hindu_temple', 'mosque',
+    'archaeological_site', 'castle', 'fortress', 'historical_landmark',
+    'campground', 'hiking_area', 'natural_feature',
+    'night_club'
+]
+TRAVELER_TAGS = {
+    'family': ['park', 'tourist_attraction', 'museum', 'shopping_mall', 'campground',
+               'natural_feature', 'library', 'theater', 'restaurant', 'cafe'],
+    'couple': ['restaurant', 'cafe', 'bar', 'theater', 'art_gallery', 'night_club',
+               'castle', 'park', 'historical_landmark', 'natural_feature'],
+    'solo': ['museum', 'library', 'cafe', 'art_gallery', 'historical_landmark', 'hiking_area',
+             'archaeological_site', 'church', 'synagogue', 'hindu_temple', 'mosque', 'fortress',
+             'tourist_attraction'],
+    'friends': ['restaurant', 'bar', 'night_club', 'shopping_mall', 'tourist_attraction', 'park',
+                'theater', 'museum', 'hiking_area', 'campground', 'natural_feature']
+}
+
+# Words the synthetic POI names are built from, so TF-IDF sees a realistic vocabulary
+NAME_WORDS = [
+    'royal', 'old', 'grand', 'little', 'golden', 'hidden', 'central', 'river', 'garden', 'harbour',
+    'sunset', 'market', 'heritage', 'blue', 'green', 'silver', 'lotus', 'palm', 'stone', 'lantern',
+    'bamboo', 'crown', 'ocean', 'hill', 'temple', 'city', 'village', 'lake', 'bridge', 'tower'
+]
+
+
+# ========== SYNTHETIC DATA ==========
+
+def generate_pois(n_rows, n_cities=N_CITIES, seed=0):
+    """POI DataFrame with the columns of pois_84_cities.csv.
+
+    City sizes follow a Zipf-like curve, so one run covers small, medium and
+    large partitions; POIs are scattered around each city center with a few
+    outliers far out, like real scraped data.
+    """
+    rng = np.random.default_rng(seed)
+
+    weights = 1.0 / np.arange(1, n_cities + 1) ** 0.8
+    city_of = rng.choice(n_cities, size=n_rows, p=weights / weights.sum())
+    centers_lat = rng.uniform(-45, 60, n_cities)
+    centers_lon = rng.uniform(-120, 150, n_cities)
+    cities = np.array([f"City {i + 1:02d}" for i in range(n_cities)], dtype=object)
+    countries = np.array([f"Country {i // 3 + 1:02d}" for i in range(n_cities)], dtype=object)
+
+    spread = np.where(rng.random(n_rows) < 0.05, 0.5, 0.05)
+    latitude = centers_lat[city_of] + rng.normal(0, 1, n_rows) * spread
+    longitude = centers_lon[city_of] + rng.normal(0, 1, n_rows) * spread
+
+    categories = np.array(CATEGORIES, dtype=object)
+    category = categories[rng.integers(len(CATEGORIES), size=n_rows)]
+    suitable = {
+        name: ', '.join(t for t in TRAVELER_TYPES if name in TRAVELER_TAGS[t]) or 'all'
+        for name in CATEGORIES
+    }
+    words = np.array([w.title() for w in NAME_WORDS], dtype=object)
+    name = (
+        pd.Series(words[rng.integers(len(words), size=n_rows)]) + ' ' +
+        pd.Series(words[rng.integers(len(words), size=n_rows)]) + ' ' +
+        pd.Series(category).str.replace('_', ' ').str.title()
+    )
+    city = pd.Series(cities[city_of])
+
+    rating = np.round(rng.uniform(3.0, 5.0, n_rows), 1)
+    rating[rng.random(n_rows) < 0.1] = 0
+    reviews = np.minimum(rng.lognormal(5, 1.5, n_rows), 200_000).astype(np.int64)
+    ids = pd.Series(np.arange(n_rows)).astype(str).str.zfill(7)
+
+    return pd.DataFrame({
+        'name': name,
+        'category': category,
+        'suitable_for': pd.Series(category).map(suitable),
+        'latitude': latitude,
+        'longitude': longitude,
+        'address': ids + ' Main Street, ' + city,
+        'phone': '',
+        'website': '',
+        'rating': rating,
+        'reviews': reviews,
+        'country': countries[city_of],
+        'city': city,
+        'place_id': 'synthetic-' + ids,
+        'photo_reference': np.where(rng.random(n_rows) < 0.3, None, 'photo-' + ids),
+        'types': pd.Series(category) + ', point_of_interest, establishment',
+        'description': name + ' - ' + pd.Series(category) + ' in ' + city
+    })
+
+
+# ========== MEASUREMENT ==========
+
+def rss_mb():
+    """(current, peak) resident set size of this process in MB"""
+    current = peak = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith('VmHWM:'):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        if sys.platform == 'darwin':
+            peak /= 1024  # bytes there, KB on Linux
+    return current, peak
+
+
+def size_buckets(recommender):
+    """Cities split into small / medium / large terciles by POI count"""
+    sizes = sorted(
+        (len(partition), key) for key, partition in recommender.model.city_index.items() if len(partition)
+    )
+    thirds = np.array_split(np.arange(len(sizes)), 3)
+    return {
+        name: [sizes[i][1] for i in positions]
+        for name, positions in zip(('small', 'medium', 'large'), thirds) if len(positions)
+    }, sizes
+
+
+def measure(models_dir, n_queries, seed=0):
+    """Runs in a fresh process: load the published artifact and time queries"""
+    from recommender.api_recommender import ItineraryRecommender
+
+    rss_before, _ = rss_mb()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender = ItineraryRecommender(models_dir=models_dir, query_log_path=False)
+    load_ms = (time.perf_counter() - started) * 1000
+    rss_loaded, _ = rss_mb()
+
+    buckets, sizes = size_buckets(recommender)
+
+    latency = {}
+    for offset, (bucket, keys) in enumerate(buckets.items()):
+        queries = sample_queries(recommender, n_queries, seed=seed + offset, keys=keys)
+        warm_up(recommender, queries, max(TOP_N_VALUES))
+        latency[bucket] = {
+            'city_pois': [min(len(recommender.model.city_index[key]) for key in keys),
+                          max(len(recommender.model.city_index[key]) for key in keys)],
+            'top_n': {str(top_n): latency_summary(run_queries(recommender, queries, top_n)[0])
+                      for top_n in TOP_N_VALUES}
+        }
+
+    _, rss_peak = rss_mb()
+    return {
+        'version': recommender.version,
+        'cities': len(sizes),
+        'load_ms': round(load_ms, 1),
+        'rss_mb': {
+            'before_load': rss_before and round(rss_before, 1),
+            'loaded': rss_loaded and round(rss_loaded, 1),
+            'peak': rss_peak and round(rss_peak, 1)
+        },
+        'latency_ms': latency
+    }
+
+
+def benchmark_size(n_rows, n_queries, workdir):
+    """Generate, train and measure one dataset size"""
+    from recommender.train_recommender import train_recommender_model
+
+    size_dir = os.path.join(workdir, str(n_rows))
+    data_path = os.path.join(size_dir, 'pois.csv')
+    models_dir = os.path.join(size_dir, 'models')
+    os.makedirs(size_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    generate_pois(n_rows).to_csv(data_path, index=False)
+    generate_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        artifact_path = train_recommender_model(data_path, models_dir)
+    train_s = time.perf_counter() - started
+    if artifact_path is None:
+        raise RuntimeError(f"training failed for {n_rows:,} rows")
+
+    artifact_bytes = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(artifact_path) for name in files
+    )
+
+    # Fresh interpreter, so RSS reflects only loading and serving this artifact
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        result = pool.apply(measure, (models_dir, n_queries))
+
+    return {
+        'rows': n_rows,
+        'generate_s': round(generate_s, 2),
+        'train_s': round(train_s, 2),
+        'artifact_mb': round(artifact_bytes / 1024 / 1024, 2),
+        **result
+    }
+
+
+def main(sizes=DEFAULT_SIZES, n_queries=200, output='benchmark_results.json'):
+    print("\n" + "="*70)
+    print("⏱️ RECOMMENDER SCALING BENCHMARK")
+    print("="*70)
+    print(f"   Sizes: {', '.join(f'{n:,}' for n in sizes)} POIs")
+    print(f"   Queries: {n_queries} per city-size bucket, top_n: {', '.join(map(str, TOP_N_VALUES))}")
+    print(f"   Output: {output}\n")
+
+    report = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'n_queries': n_queries,
+        'top_n': list(TOP_N_VALUES),
+        'results': []
+    }
+
+    workdir = tempfile.mkdtemp(prefix='recommender-bench-')
+    try:
+        for n_rows in sizes:
+            print(f"📦 {n_rows:,} POIs...")
+            result = benchmark_size(n_rows, n_queries, workdir)
+            report['results'].append(result)
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+            rss = result['rss_mb']
+            print(f"   ✅ Train {result['train_s']:.1f}s, artifact {result['artifact_mb']:.1f} MB, "
+                  f"{result['cities']} cities")
+            print(f"   ✅ Load {result['load_ms']:.0f} ms, RSS {rss['loaded']} MB loaded / {rss['peak']} MB peak")
+            for bucket, stats in result['latency_ms'].items():
+                low, high = stats['city_pois']
+                line = '  '.join(
+                    f"top{top_n} p50 {s['p50']:.2f} p95 {s['p95']:.2f} p99 {s['p99']:.2f}"
+                    for top_n, s in stats['top_n'].items()
+                )
+                print(f"   {bucket:>6} ({low:,}-{high:,} POIs): {line}")
+            print()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"📊 Results written to {output}")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    sizes = [int(n) for n in sys.argv[1].split(',')] if len(sys.argv) > 1 else DEFAULT_SIZES
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    output = sys.argv[3] if len(sys.argv) > 3 else 'benchmark_results.json'
+    main(sizes, n_queries, output)
@@ -0,0 +1,63 @@
+# ========== benchmark_scoring.py ==========
+"""Compare the sparse (TF-IDF) and dense (int8 LSA) scoring modes.
+
+Runs the same sample of city/category queries through both modes with the
+result cache disabled and reports per-query latency plus how closely the
+dense top-k agrees with the sparse one. Needs an artifact trained with
+LSA_COMPONENTS > 0.
+
+    python benchmark_scoring.py [n_queries] [top_n]
+"""
+import io
+import os
+import sys
+import contextlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender.api_recommender import ItineraryRecommender
+from recommender.benchmarking import sample_queries, run_queries, warm_up, latency_summary, overlap_at
+
+
+def main(n_queries=200, top_n=40):
+    with contextlib.redirect_stdout(io.StringIO()):
+        sparse = ItineraryRecommender(scoring='sparse', query_log_path=False)
+        dense = ItineraryRecommender(scoring='dense', query_log_path=False)
+
+    print("\n" + "="*70)
+    print("⏱️ SPARSE vs DENSE SCORING BENCHMARK")
+    print("="*70)
+    print(f"   Model version: {sparse.version}")
+
+    if dense.model.scoring != 'dense':
+        print("   ❌ Artifact has no LSA embeddings. Retrain with LSA_COMPONENTS=128 (for example).")
+        return
+
+    print(f"   LSA components: {dense.model.artifacts.lsa_codes.shape[1]}")
+    print(f"   Queries: {n_queries}, top_n: {top_n}\n")
+
+    queries = sample_queries(sparse, n_queries)
+    warm_up(sparse, queries, top_n)
+    warm_up(dense, queries, top_n)
+
+    sparse_ms, sparse_rankings = run_queries(sparse, queries, top_n)
+    dense_ms, dense_rankings = run_queries(dense, queries, top_n)
+
+    print("📊 LATENCY (ms per uncached request)")
+    for name, latencies in (('sparse', sparse_ms), ('dense', dense_ms)):
+        stats = latency_summary(latencies)
+        print(f"   {name:>6}: p50 {stats['p50']:.2f}  p95 {stats['p95']:.2f}  p99 {stats['p99']:.2f}  "
+              f"mean {stats['mean']:.2f}")
+
+    print("\n🎯 RANKING AGREEMENT (dense vs sparse)")
+    for k in sorted({10, top_n}):
+        overlaps = [overlap_at(s, d, k) for s, d in zip(sparse_rankings, dense_rankings)]
+        print(f"   overlap@{k}: mean {np.mean(overlaps):.3f}  min {np.min(overlaps):.3f}")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
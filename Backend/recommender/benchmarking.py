@@ -0,0 +1,84 @@
+# ========== benchmarking.py ==========
+"""Helpers shared by the offline benchmark and comparison scripts.
+
+Queries are dicts of get_recommendations arguments (city, country,
+categories, traveler_type and optionally top_n, diversity); other keys such
+as a query 'id' are ignored when replaying.
+"""
+import io
+import time
+import contextlib
+
+import numpy as np
+
+from recommender.encoding import TRAVELER_TYPES
+
+# Query keys passed through to get_recommendations
+QUERY_ARGS = ('city', 'country', 'categories', 'traveler_type', 'top_n', 'diversity')
+
+# Queries replayed once before timing, to fault in mapped pages and warm code paths
+WARMUP_QUERIES = 10
+
+
+def sample_queries(recommender, n_queries, seed=0, keys=None):
+    """Seeded random queries over the loaded partitions (or only the given city keys)"""
+    rng = np.random.default_rng(seed)
+    model = recommender.model
+    if keys is None:
+        keys = [key for key, partition in model.city_index.items() if len(partition)]
+    categories = [name for name in model.category_codes if name]
+
+    queries = []
+    for _ in range(n_queries):
+        city, country = keys[rng.integers(len(keys))]
+        picked = list(rng.choice(categories, size=min(len(categories), int(rng.integers(1, 4))), replace=False))
+        queries.append({
+            'city': city,
+            'country': country,
+            'categories': picked,
+            'traveler_type': TRAVELER_TYPES[rng.integers(len(TRAVELER_TYPES))]
+        })
+    return queries
+
+
+def run_queries(recommender, queries, top_n=None, repeats=1):
+    """Median uncached latency (ms) and ranked place_ids per query.
+
+    top_n, when given, overrides every query's own top_n.
+    """
+    latencies, rankings = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in queries:
+            arguments = {name: query[name] for name in QUERY_ARGS if name in query}
+            if top_n is not None:
+                arguments['top_n'] = top_n
+            timings = []
+            for _ in range(repeats):
+                recommender.cache.clear()
+                started = time.perf_counter()
+                results = recommender.get_recommendations(**arguments)
+                timings.append((time.perf_counter() - started) * 1000)
+            latencies.append(float(np.median(timings)))
+            rankings.append([r['place_id'] for r in results])
+    return np.array(latencies), rankings
+
+
+def warm_up(recommender, queries, top_n=None):
+    """Replay the first few queries untimed before measuring"""
+    run_queries(recommender, queries[:WARMUP_QUERIES], top_n)
+
+
+def latency_summary(latencies):
+    """p50/p95/p99/mean (ms) of a latency array, rounded for JSON reports"""
+    latencies = np.asarray(latencies, dtype=np.float64)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'p50': round(float(p50), 3), 'p95': round(float(p95), 3), 'p99': round(float(p99), 3),
+        'mean': round(float(latencies.mean()), 3), 'n': int(len(latencies))
+    }
+
+
+def overlap_at(reference, candidate, k):
+    """Share of the reference top-k that also appears in the candidate top-k"""
+    wanted = set(reference[:k])
+    return len(wanted & set(candidate[:k])) / len(wanted) if wanted else 1.0
@@ -0,0 +1,63 @@
+# ========== build_cooccurrence.py ==========
+"""Offline job: fold users/*/savedItineraries into models/cooccurrence.npz.
+
+Safe to run on a schedule (e.g. nightly cron); each run only re-counts
+itineraries that changed since the previous one. A running recommender
+picks up the new file through its model watcher.
+
+    python build_cooccurrence.py
+"""
+import os
+import sys
+from datetime import datetime
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender.cooccurrence import update_cooccurrence
+
+
+def saved_itineraries(db):
+    """(path, update time, document) for every users/*/savedItineraries document"""
+    for doc in db.collection_group('savedItineraries').stream():
+        updated = doc.update_time.isoformat() if doc.update_time else ''
+        yield doc.reference.path, updated, doc.to_dict() or {}
+
+
+def build_cooccurrence():
+    print("\n" + "="*70)
+    print("🤝 UPDATING SAVED-ITINERARY CO-OCCURRENCE")
+    print("="*70)
+    print(f"⏰ Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    key_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS') or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'serviceAccountKey.json'
+    )
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(key_path))
+    db = firestore.client()
+    print("   ✅ Connected to Firestore")
+
+    models_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+    os.makedirs(models_dir, exist_ok=True)
+
+    stats = update_cooccurrence(models_dir, saved_itineraries(db))
+
+    print(f"   ✅ Scanned {stats['itineraries']:,} saved itineraries")
+    print(f"   ✅ New: {stats['new']:,}  Changed: {stats['changed']:,}  Deleted: {stats['deleted']:,}")
+    print(f"   ✅ {stats['places']:,} places, {stats['pairs']:,} non-zero pairs")
+    print(f"   ✅ Published co-occurrence version {stats['version']}")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    try:
+        build_cooccurrence()
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Interrupted by user")
+    except Exception as e:
+        print(f"\n\n❌ Error updating co-occurrence: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,254 @@
+# ========== compare_versions.py ==========
+"""Ranking-quality and latency regression check between two model versions.
+
+Replays a fixed query set against a baseline and a candidate artifact
+version (fully offline, from models/artifacts/) and reports:
+
+    overlap@k            how much of the baseline top-k the candidate keeps
+    NDCG@k               per version, against a held-out judgement file
+    latency              uncached p50/p95/p99 per version and the delta
+
+    python compare_versions.py BASELINE CANDIDATE [queries] [judgements] [output]
+    python compare_versions.py 20250101-120000 current queries.json judgements.json
+
+A version is an artifact directory name or 'current'. Appending
+@similarity,rating,popularity overrides SCORE_WEIGHTS for that side, so a
+weight change can be tried on one artifact:
+
+    python compare_versions.py current current@0.5,0.3,0.2 queries.json judgements.json
+
+queries is a JSON list (or JSON lines, e.g. the RECOMMENDER_QUERY_LOG file) of
+{"id", "city", "country", "categories", "traveler_type", "top_n", "diversity"};
+id defaults to the position in the file. Without it, a seeded sample over the
+baseline's cities is used. judgements maps query id to {place_id: grade},
+grades 0 (irrelevant) to 3 (perfect). The full report is written as JSON
+(default version_comparison.json); the exit status is 1 when NDCG or p95
+latency regresses past MAX_NDCG_DROP / MAX_P95_SLOWDOWN.
+"""
+import io
+import os
+import sys
+import json
+import contextlib
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender.api_recommender import ItineraryRecommender
+from recommender.benchmarking import sample_queries, run_queries, warm_up, latency_summary, overlap_at
+
+# Regression gates (candidate vs baseline)
+MAX_NDCG_DROP = 0.02
+MAX_P95_SLOWDOWN = 1.20
+
+# Each query is timed this many times; its median counts
+LATENCY_REPEATS = 3
+
+
+# ========== INPUTS ==========
+
+def load_queries(path):
+    """Queries from a JSON list or JSON lines file, each with an 'id'"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    try:
+        entries = json.loads(text)
+    except json.JSONDecodeError:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    queries = []
+    for position, entry in enumerate(entries):
+        queries.append({
+            'id': str(entry.get('id', position)),
+            'city': entry['city'],
+            'country': entry['country'],
+            'categories': list(entry.get('categories') or []),
+            'traveler_type': entry.get('traveler_type', 'solo'),
+            'top_n': int(entry.get('top_n', 40)),
+            'diversity': float(entry.get('diversity', 0.0))
+        })
+    return queries
+
+
+def default_queries(recommender, n_queries=200):
+    """Seeded sample of the baseline's cities, so reruns replay the same set"""
+    return [
+        dict(query, id=str(position), top_n=40, diversity=0.0)
+        for position, query in enumerate(sample_queries(recommender, n_queries))
+    ]
+
+
+def load_judgements(path):
+    """query id -> {place_id: grade}"""
+    with open(path, encoding='utf-8') as f:
+        return {
+            str(query_id): {place_id: float(grade) for place_id, grade in grades.items()}
+            for query_id, grades in json.load(f).items()
+        }
+
+
+def open_version(spec, models_dir=None):
+    """Recommender for 'version[@w1,w2,w3]' with the result cache left cold"""
+    version, _, weights = spec.partition('@')
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender = ItineraryRecommender(models_dir=models_dir, query_log_path=False)
+        if version != 'current' and version != recommender.version and not recommender.reload(version):
+            raise FileNotFoundError(f"Model version '{version}' could not be loaded from {recommender.models_dir}")
+    if weights:
+        recommender.SCORE_WEIGHTS = tuple(float(w) for w in weights.split(','))
+        if len(recommender.SCORE_WEIGHTS) != 3:
+            raise ValueError(f"Expected 3 score weights in '{spec}'")
+    return recommender
+
+
+# ========== METRICS ==========
+
+def ndcg_at(ranking, grades, k):
+    """NDCG@k of a ranked place_id list against graded judgements (unjudged = 0)"""
+    gains = np.array([grades.get(place_id, 0.0) for place_id in ranking[:k]])
+    ideal = np.sort(np.array(list(grades.values())))[::-1][:k]
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    ideal_dcg = float(((2 ** ideal - 1) * discounts[:len(ideal)]).sum())
+    if ideal_dcg == 0:
+        return None
+    return float(((2 ** gains - 1) * discounts[:len(gains)]).sum()) / ideal_dcg
+
+
+def compare(baseline, candidate, queries, judgements=None, ks=(5, 10, 40)):
+    """Full comparison report as a dict"""
+    warm_up(baseline, queries)
+    warm_up(candidate, queries)
+    baseline_ms, baseline_rankings = run_queries(baseline, queries, repeats=LATENCY_REPEATS)
+    candidate_ms, candidate_rankings = run_queries(candidate, queries, repeats=LATENCY_REPEATS)
+
+    report = {
+        'queries': len(queries),
+        'overlap': {},
+        'ndcg': {},
+        'latency_ms': {
+            'baseline': latency_summary(baseline_ms),
+            'candidate': latency_summary(candidate_ms)
+        },
+        'per_query': []
+    }
+    for stat in ('p50', 'p95', 'p99', 'mean'):
+        before, after = report['latency_ms']['baseline'][stat], report['latency_ms']['candidate'][stat]
+        report['latency_ms'].setdefault('delta', {})[stat] = round(after - before, 3)
+        report['latency_ms'].setdefault('ratio', {})[stat] = round(after / before, 3) if before else None
+
+    for k in ks:
+        overlaps = [overlap_at(b, c, k) for b, c in zip(baseline_rankings, candidate_rankings)]
+        report['overlap'][f'@{k}'] = {'mean': round(float(np.mean(overlaps)), 4),
+                                      'min': round(float(np.min(overlaps)), 4)}
+
+    judgements = judgements or {}
+    judged = [i for i, query in enumerate(queries) if judgements.get(query['id'])]
+    report['judged_queries'] = len(judged)
+    for k in ks:
+        pairs = [
+            (ndcg_at(baseline_rankings[i], judgements[queries[i]['id']], k),
+             ndcg_at(candidate_rankings[i], judgements[queries[i]['id']], k))
+            for i in judged
+        ]
+        pairs = [pair for pair in pairs if pair[0] is not None]
+        if pairs:
+            before, after = np.mean(pairs, axis=0)
+            report['ndcg'][f'@{k}'] = {'baseline': round(float(before), 4), 'candidate': round(float(after), 4),
+                                       'delta': round(float(after - before), 4)}
+
+    k = max(ks)
+    for i, query in enumerate(queries):
+        grades = judgements.get(query['id'])
+        entry = {
+            'id': query['id'],
+            'overlap': round(overlap_at(baseline_rankings[i], candidate_rankings[i], k), 4),
+            'baseline_ms': round(float(baseline_ms[i]), 3),
+            'candidate_ms': round(float(candidate_ms[i]), 3)
+        }
+        if grades:
+            for side, rankings in (('baseline', baseline_rankings), ('candidate', candidate_rankings)):
+                ndcg = ndcg_at(rankings[i], grades, k)
+                entry[f'ndcg_{side}'] = None if ndcg is None else round(ndcg, 4)
+        report['per_query'].append(entry)
+    return report
+
+
+def regressions(report):
+    """Human-readable list of gates the candidate fails"""
+    failed = []
+    for k, ndcg in report['ndcg'].items():
+        if ndcg['delta'] < -MAX_NDCG_DROP:
+            failed.append(f"NDCG{k} dropped {-ndcg['delta']:.4f} (max {MAX_NDCG_DROP})")
+    ratio = report['latency_ms']['ratio']['p95']
+    if ratio is not None and ratio > MAX_P95_SLOWDOWN:
+        failed.append(f"p95 latency x{ratio:.2f} (max x{MAX_P95_SLOWDOWN:.2f})")
+    return failed
+
+
+def main(baseline_spec, candidate_spec, queries_path=None, judgements_path=None,
+         output='version_comparison.json'):
+    baseline = open_version(baseline_spec)
+    candidate = open_version(candidate_spec)
+    queries = load_queries(queries_path) if queries_path else default_queries(baseline)
+    judgements = load_judgements(judgements_path) if judgements_path else None
+
+    print("\n" + "="*70)
+    print("🔬 MODEL VERSION COMPARISON")
+    print("="*70)
+    print(f"   Baseline:  {baseline.version} (weights {baseline.SCORE_WEIGHTS})")
+    print(f"   Candidate: {candidate.version} (weights {candidate.SCORE_WEIGHTS})")
+    print(f"   Queries: {len(queries)}{'' if queries_path else ' (seeded sample)'}\n")
+
+    report = compare(baseline, candidate, queries, judgements)
+    report['baseline'] = {'spec': baseline_spec, 'version': baseline.version, 'weights': baseline.SCORE_WEIGHTS}
+    report['candidate'] = {'spec': candidate_spec, 'version': candidate.version, 'weights': candidate.SCORE_WEIGHTS}
+    report['generated'] = datetime.now().isoformat(timespec='seconds')
+    failed = regressions(report)
+    report['regressions'] = failed
+
+    print("🎯 RANKING AGREEMENT (candidate vs baseline)")
+    for k, overlap in report['overlap'].items():
+        print(f"   overlap{k}: mean {overlap['mean']:.3f}  min {overlap['min']:.3f}")
+
+    if report['ndcg']:
+        print(f"\n📐 NDCG ({report['judged_queries']} judged queries)")
+        for k, ndcg in report['ndcg'].items():
+            print(f"   NDCG{k}: {ndcg['baseline']:.4f} → {ndcg['candidate']:.4f} ({ndcg['delta']:+.4f})")
+    elif judgements_path:
+        print("\n⚠️ No query in the judgement file matched the query set")
+
+    print("\n⏱️ LATENCY (ms per uncached request)")
+    latency = report['latency_ms']
+    for stat in ('p50', 'p95', 'p99', 'mean'):
+        print(f"   {stat:>4}: {latency['baseline'][stat]:.2f} → {latency['candidate'][stat]:.2f} "
+              f"({latency['delta'][stat]:+.2f})")
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📊 Report written to {output}")
+
+    if failed:
+        for message in failed:
+            print(f"   ❌ {message}")
+    else:
+        print("   ✅ No regressions")
+    print("="*70 + "\n")
+    return not failed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(2)
+    try:
+        sys.exit(0 if main(*sys.argv[1:6]) else 1)
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Interrupted by user")
+        sys.exit(2)
+    except Exception as e:
+        print(f"\n\n❌ Error comparing versions: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(2)
@@ -0,0 +1,169 @@
+# ========== cooccurrence.py ==========
+""""People who saved X also saved Y" counts from users' saved itineraries.
+
+build_cooccurrence.py (offline) keeps two files next to the model artifacts:
+
+    models/cooccurrence.npz          place_id x place_id save counts (CSR) + place_ids
+    models/cooccurrence_state.json   place_ids already counted per saved itinerary
+
+The state file makes updates incremental: only itineraries that are new,
+changed or deleted since the last run are re-counted, as a sparse delta.
+The recommender only ever reads rows of the CSR matrix.
+"""
+import os
+import json
+from datetime import datetime
+
+import numpy as np
+from scipy.sparse import csr_matrix, coo_matrix
+
+COOCCURRENCE_FILE = 'cooccurrence.npz'
+STATE_FILE = 'cooccurrence_state.json'
+
+# Keys that hold a Google place id inside a saved itinerary document
+PLACE_ID_KEYS = ('place_id', 'placeId')
+
+
+def extract_place_ids(document):
+    """Distinct place ids anywhere in a (nested) saved-itinerary document, sorted"""
+    found = set()
+    stack = [document]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in PLACE_ID_KEYS and isinstance(item, str) and item:
+                    found.add(item)
+                elif isinstance(item, (dict, list, tuple)):
+                    stack.append(item)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return sorted(found)
+
+
+class CooccurrenceIndex:
+    """Symmetric co-save counts between place ids (diagonal = times saved)"""
+
+    def __init__(self, matrix, place_ids, version=None):
+        self.matrix = csr_matrix(matrix)
+        self.place_ids = list(place_ids)
+        self.index = {pid: i for i, pid in enumerate(self.place_ids)}
+        self.version = version
+
+    def __len__(self):
+        return len(self.place_ids)
+
+    def related(self, seed_place_ids):
+        """place_id -> co-save count with any of the seeds (seeds themselves excluded)"""
+        seeds = [self.index[pid] for pid in seed_place_ids if pid in self.index]
+        if not seeds:
+            return {}
+        rows = self.matrix[seeds]  # sparse row read, summed over seeds below
+        columns, inverse = np.unique(rows.indices, return_inverse=True)
+        counts = np.bincount(inverse, weights=rows.data, minlength=len(columns))
+        seed_set = set(seeds)
+        return {self.place_ids[c]: float(n) for c, n in zip(columns, counts) if c not in seed_set}
+
+    @classmethod
+    def load(cls, models_dir):
+        """Load models/cooccurrence.npz, or None if the job has not run yet"""
+        path = os.path.join(models_dir, COOCCURRENCE_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as f:
+            n = len(f['place_ids'])
+            matrix = csr_matrix((f['data'], f['indices'], f['indptr']), shape=(n, n))
+            return cls(matrix, f['place_ids'].tolist(), version=str(f['version']))
+
+    def save(self, models_dir):
+        """Write atomically so a serving process never reads a half-written file"""
+        path = os.path.join(models_dir, COOCCURRENCE_FILE)
+        tmp_path = path + '.tmp.npz'
+        np.savez(
+            tmp_path,
+            data=self.matrix.data.astype(np.float32),
+            indices=self.matrix.indices.astype(np.int32),
+            indptr=self.matrix.indptr.astype(np.int64),
+            place_ids=np.array(self.place_ids, dtype=str),
+            version=np.array(self.version or '')
+        )
+        os.replace(tmp_path, path)
+
+
+def _pair_counts(place_lists, index, n):
+    """Sparse n x n counts of every (a, b) pair, a == b included, over the given lists"""
+    rows, cols = [], []
+    for place_ids in place_lists:
+        positions = np.array([index[pid] for pid in place_ids if pid in index], dtype=np.int64)
+        rows.append(np.repeat(positions, len(positions)))
+        cols.append(np.tile(positions, len(positions)))
+    if not rows:
+        return csr_matrix((n, n), dtype=np.float32)
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    return coo_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n, n)).tocsr()
+
+
+def update_cooccurrence(models_dir, itineraries):
+    """Apply new/changed/deleted saved itineraries to the stored counts.
+
+    `itineraries` yields (key, updated, document) for every saved itinerary,
+    where key is stable (e.g. 'uid/itinerary_id') and updated is a string
+    that changes whenever the document does. Documents whose key and updated
+    match the state file are not parsed again.
+
+    Returns a dict of counters for logging.
+    """
+    state_path = os.path.join(models_dir, STATE_FILE)
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, encoding='utf-8') as f:
+            state = json.load(f)
+
+    seen, added, removed = set(), [], []
+    stats = {'itineraries': 0, 'new': 0, 'changed': 0, 'deleted': 0}
+    for key, updated, document in itineraries:
+        seen.add(key)
+        stats['itineraries'] += 1
+        previous = state.get(key)
+        if previous is not None and previous['updated'] == updated:
+            continue
+        place_ids = extract_place_ids(document)
+        if previous is not None:
+            removed.append(previous['place_ids'])
+            stats['changed'] += 1
+        else:
+            stats['new'] += 1
+        added.append(place_ids)
+        state[key] = {'updated': updated, 'place_ids': place_ids}
+
+    for key in [k for k in state if k not in seen]:
+        removed.append(state.pop(key)['place_ids'])
+        stats['deleted'] += 1
+
+    current = CooccurrenceIndex.load(models_dir)
+    place_ids = list(current.place_ids) if current is not None else []
+    index = {pid: i for i, pid in enumerate(place_ids)}
+    for pid in sorted({pid for places in added for pid in places} - set(index)):
+        index[pid] = len(place_ids)
+        place_ids.append(pid)
+
+    n = len(place_ids)
+    matrix = csr_matrix((n, n), dtype=np.float32)
+    if current is not None:
+        old = current.matrix.tocoo()
+        matrix = coo_matrix((old.data, (old.row, old.col)), shape=(n, n)).tocsr()
+    matrix = matrix + _pair_counts(added, index, n) - _pair_counts(removed, index, n)
+    matrix.eliminate_zeros()
+
+    version = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    CooccurrenceIndex(matrix, place_ids, version=version).save(models_dir)
+
+    tmp_state = state_path + '.tmp'
+    with open(tmp_state, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_state, state_path)
+
+    stats['places'] = n
+    stats['pairs'] = int(matrix.nnz)
+    stats['version'] = version
+    return stats
@@ -0,0 +1,35 @@
+# ========== diversity.py ==========
+import numpy as np
+
+
+def mmr_select(relevance, similarity, k, diversity):
+    """Greedy Maximal Marginal Relevance selection.
+
+    relevance:  (n,) relevance score per candidate
+    similarity: (n, n) candidate-candidate similarity
+    diversity:  weight of the redundancy penalty in [0, 1]
+                (0 = pure relevance order, 1 = only avoid near-duplicates)
+
+    Picks k candidates, each maximizing
+        (1 - diversity) * relevance - diversity * max similarity to those already picked.
+    Returns candidate positions in pick order.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    relevance = np.asarray(relevance, dtype=np.float64)
+    max_similarity = np.zeros(n, dtype=np.float64)
+    available = np.ones(n, dtype=bool)
+    picked = np.empty(k, dtype=np.int64)
+
+    for step in range(k):
+        mmr = (1 - diversity) * relevance - diversity * max_similarity
+        mmr[~available] = -np.inf
+        best = int(mmr.argmax())
+        picked[step] = best
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+
+    return picked
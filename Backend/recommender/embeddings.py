@@ -0,0 +1,31 @@
+# ========== embeddings.py ==========
+import numpy as np
+
+
+def quantize_rows(vectors):
+    """L2-normalize each row and store it as int8 codes plus one float32 scale.
+
+    codes[i] * scales[i] approximates the unit-length row i, so a dot product
+    against a unit query approximates the cosine similarity.
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0)
+
+    peaks = np.abs(unit).max(axis=1) if unit.shape[1] else np.zeros(len(unit))
+    scales = np.where(peaks > 0, peaks / 127.0, 1.0)
+    codes = np.rint(unit / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def project_queries(query_matrix, components):
+    """Project sparse TF-IDF query rows onto LSA components as unit (k, n_queries) columns"""
+    projected = np.asarray(query_matrix @ np.asarray(components).T, dtype=np.float32)
+    lengths = np.linalg.norm(projected, axis=1, keepdims=True)
+    np.divide(projected, lengths, out=projected, where=lengths > 0)
+    return projected.T
+
+
+def dense_scores(codes, scales, query_vectors):
+    """Approximate cosine of every quantized row against each query column"""
+    return (codes @ query_vectors) * scales[:, None]
@@ -0,0 +1,42 @@
+# ========== encoding.py ==========
+import numpy as np
+
+
+# Traveler types we encode into the per-POI bitmask (bit i = TRAVELER_TYPES[i])
+TRAVELER_TYPES = ('family', 'couple', 'solo', 'friends')
+TRAVELER_BITS = {name: 1 << i for i, name in enumerate(TRAVELER_TYPES)}
+
+
+def city_key(city, country):
+    """Normalized (city, country) key used to partition POIs"""
+    return (str(city).strip().lower(), str(country).strip().lower())
+
+
+def traveler_bit(traveler_type):
+    """Bit for a traveler type, or 0 if it is not one we encode"""
+    return TRAVELER_BITS.get(str(traveler_type).strip().lower(), 0)
+
+
+def encode_traveler_mask(suitable_for):
+    """Encode 'suitable_for' strings (e.g. 'family, solo') as a uint8 bitmask per POI"""
+    mask = np.zeros(len(suitable_for), dtype=np.uint8)
+
+    for i, value in enumerate(suitable_for):
+        if not isinstance(value, str):
+            continue
+        text = value.lower()
+        for name, bit in TRAVELER_BITS.items():
+            if name in text:
+                mask[i] |= bit
+
+    return mask
+
+
+def encode_categories(categories):
+    """Encode category strings as int16 codes into a sorted category list"""
+    values = ['' if not isinstance(c, str) else c for c in categories]
+    names = sorted(set(values))
+    lookup = {name: code for code, name in enumerate(names)}
+    codes = np.fromiter((lookup[v] for v in values), dtype=np.int16, count=len(values))
+
+    return codes, names
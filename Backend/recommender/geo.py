@@ -0,0 +1,151 @@
+# ========== geo.py ==========
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0  # Earth's radius in km
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Vectorized Haversine distance in km.
+
+    Accepts scalars or NumPy arrays (broadcast against each other), so the
+    same kernel serves a single point pair and whole coordinate columns.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+KM_PER_DEGREE_LAT = 111.195  # great-circle km per degree of latitude
+
+
+class SpatialGrid:
+    """Uniform lat/lon grid over point coordinates for radius and k-nearest queries.
+
+    Points are sorted by grid cell once; a query only visits the cells that
+    overlap its bounding box and runs the haversine kernel on those points.
+
+    The coordinates are kept as given (e.g. float32 memory-mapped columns), and
+    a cell index built at train time (order, cell_keys, cell_starts) can be
+    passed in, so opening a grid copies and sorts nothing.
+    """
+
+    # Above this many cells a query just scans every point
+    MAX_QUERY_CELLS = 4096
+
+    def __init__(self, latitudes, longitudes, cell_deg=0.05, order=None, cell_keys=None, cell_starts=None):
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.ceil(180 / cell_deg)) + 1
+        self.n_cols = int(np.ceil(360 / cell_deg))
+        self.latitudes = np.asarray(latitudes)
+        self.longitudes = np.asarray(longitudes)
+
+        if order is None:
+            cells = self._cell_ids(self.latitudes.astype(np.float64), self.longitudes.astype(np.float64))
+            order = np.argsort(cells, kind='stable').astype(np.int32 if len(cells) < 2 ** 31 else np.int64)
+            cell_keys, cell_starts = np.unique(cells[order], return_index=True)
+            cell_starts = np.append(cell_starts, len(cells))
+        self.order = order              # point indices sorted by cell
+        self.cell_keys = cell_keys      # distinct cell ids, ascending
+        self.cell_starts = cell_starts  # cell s holds order[cell_starts[s]:cell_starts[s + 1]]
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    def _cell_rows(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+
+    def _cell_cols(self, lon):
+        return np.floor((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64) % self.n_cols
+
+    def _cell_ids(self, lat, lon):
+        return self._cell_rows(lat) * self.n_cols + self._cell_cols(lon)
+
+    def _candidates(self, lat, lon, radius_km):
+        """Point indices in the cells overlapping the query's bounding box"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlon = min(radius_km / (KM_PER_DEGREE_LAT * max(np.cos(np.radians(lat)), 1e-6)), 180.0)
+
+        rows = np.arange(self._cell_rows(lat - dlat), self._cell_rows(lat + dlat) + 1)
+        n_cols = min(int(np.ceil(2 * dlon / self.cell_deg)) + 1, self.n_cols)
+        cols = (self._cell_cols(lon - dlon) + np.arange(n_cols)) % self.n_cols
+
+        if len(rows) * len(cols) > self.MAX_QUERY_CELLS:
+            return np.arange(len(self))
+
+        wanted = (rows[:, None] * self.n_cols + cols[None, :]).ravel()
+        slots = np.searchsorted(self.cell_keys, wanted)
+        slots = slots[slots < len(self.cell_keys)]
+        slots = slots[np.isin(self.cell_keys[slots], wanted)]
+        if len(slots) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        return np.concatenate([self.order[self.cell_starts[s]:self.cell_starts[s + 1]] for s in slots])
+
+    def query_radius(self, lat, lon, radius_km):
+        """Indices and distances (km) of points within radius_km, nearest first"""
+        indices = self._candidates(lat, lon, radius_km)
+        distances = haversine_km(lat, lon, self.latitudes[indices], self.longitudes[indices])
+
+        keep = distances <= radius_km
+        indices, distances = indices[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return indices[order], distances[order]
+
+    def nearest(self, lat, lon, k, max_radius_km=50.0):
+        """Up to k nearest points within max_radius_km, searching outward from 1 km"""
+        radius_km = min(1.0, max_radius_km)
+        while True:
+            indices, distances = self.query_radius(lat, lon, radius_km)
+            if len(indices) >= k or radius_km >= max_radius_km:
+                return indices[:k], distances[:k]
+            radius_km = min(radius_km * 2, max_radius_km)
+
+
+def condensed_index(n, i, j):
+    """Position of pair (i, j), i != j, in a condensed upper-triangle matrix of n points"""
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+
+def condensed_distances(latitudes, longitudes, out):
+    """Fill `out` (length n*(n-1)/2) with pairwise haversine km, row by row"""
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    pos = 0
+    for i in range(len(lat) - 1):
+        d = haversine_km(lat[i], lon[i], lat[i + 1:], lon[i + 1:])
+        out[pos:pos + len(d)] = d
+        pos += len(d)
+    return out
+
+
+def city_center_radius(latitudes, longitudes, min_radius_km=5.0, max_radius_km=80.0, spread=3.0):
+    """Robust center and coverage radius of one city's POIs.
+
+    The center is the coordinate-wise median (longitudes unwrapped around the
+    first point, so cities on the antimeridian work). The radius is the median
+    distance to the center plus `spread` scaled MADs, clamped to
+    [min_radius_km, max_radius_km], so a few mis-geocoded POIs can't stretch it.
+
+    Returns (center_lat, center_lon, radius_km, distance_km per POI).
+    """
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    if len(lat) == 0:
+        return 0.0, 0.0, float(min_radius_km), np.empty(0)
+
+    unwrapped = lon[0] + (lon - lon[0] + 180.0) % 360.0 - 180.0
+    center_lat = float(np.median(lat))
+    center_lon = float((np.median(unwrapped) + 180.0) % 360.0 - 180.0)
+
+    distances = haversine_km(center_lat, center_lon, lat, lon)
+    median = np.median(distances)
+    mad = np.median(np.abs(distances - median)) * 1.4826
+    radius = float(np.clip(median + spread * mad, min_radius_km, max_radius_km))
+    return center_lat, center_lon, radius, distances
@@ -0,0 +1,163 @@
+# ========== planner.py ==========
+import numpy as np
+
+from recommender.geo import haversine_km
+
+
+def haversine_matrix(latitudes, longitudes):
+    """Pairwise haversine distances (km) between points, as an n x n array"""
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    return haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+def _project(latitudes, longitudes):
+    """Equirectangular projection to km, good enough for clustering within one city"""
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    scale = np.cos(np.radians(lat.mean())) if len(lat) else 1.0
+    return np.column_stack((lon * scale, lat)) * 111.195
+
+
+def cluster_days(latitudes, longitudes, n_days, iterations=25, seed=0):
+    """Split points into n_days geographically compact, size-balanced groups.
+
+    Vectorized k-means (k-means++ seeding) on projected coordinates, followed
+    by a capacity-limited assignment so no day gets more than ceil(n / n_days)
+    points. Returns one cluster label per point.
+    """
+    points = _project(latitudes, longitudes)
+    n = len(points)
+    n_days = max(1, min(n_days, n))
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # k-means++ seeding, deterministic for a given seed
+    rng = np.random.default_rng(seed)
+    centers = [points[rng.integers(n)]]
+    for _ in range(1, n_days):
+        d2 = ((points[:, None, :] - np.array(centers)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        total = d2.sum()
+        centers.append(points[rng.choice(n, p=d2 / total)] if total > 0 else points[rng.integers(n)])
+    centers = np.array(centers)
+
+    for _ in range(iterations):
+        labels = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        new_centers = np.array([
+            points[labels == c].mean(axis=0) if np.any(labels == c) else centers[c]
+            for c in range(n_days)
+        ])
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+
+    # Capacity-limited assignment: closest (point, center) pairs first
+    capacity = int(np.ceil(n / n_days))
+    distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    labels = np.full(n, -1, dtype=np.int64)
+    sizes = np.zeros(n_days, dtype=np.int64)
+    for flat in np.argsort(distances, axis=None, kind='stable'):
+        point, center = divmod(int(flat), n_days)
+        if labels[point] == -1 and sizes[center] < capacity:
+            labels[point] = center
+            sizes[center] += 1
+
+    return labels
+
+
+def order_route(distance_matrix, start=0):
+    """Visit order for an open path: nearest-neighbour tour improved with 2-opt"""
+    n = len(distance_matrix)
+    if n <= 2:
+        return [start] + [i for i in range(n) if i != start]
+
+    # Nearest-neighbour construction
+    route = [start]
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    for _ in range(n - 1):
+        d = np.where(visited, np.inf, distance_matrix[route[-1]])
+        nxt = int(d.argmin())
+        route.append(nxt)
+        visited[nxt] = True
+    route = np.array(route)
+
+    # 2-opt: reverse route[i:j+1] when it shortens the path (first node stays fixed)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            js = np.arange(i + 1, n)
+            c = route[js]
+            d = np.append(route[i + 2:], -1)[:len(js)]
+            has_next = d >= 0
+            before = distance_matrix[a, b] + np.where(has_next, distance_matrix[c, np.maximum(d, 0)], 0.0)
+            after = distance_matrix[a, c] + np.where(has_next, distance_matrix[b, np.maximum(d, 0)], 0.0)
+            gains = before - after
+            best = int(gains.argmax())
+            if gains[best] > 1e-9:
+                j = int(js[best])
+                route[i:j + 1] = route[i:j + 1][::-1]
+                improved = True
+
+    return route.tolist()
+
+
+def plan_days(activities, n_days, seed=0):
+    """Group activities (dicts with latitude/longitude/score) into ordered day plans.
+
+    Each day is a compact geographic cluster whose activities are ordered by a
+    nearest-neighbour + 2-opt route starting from its best-scored activity.
+    Days themselves are chained nearest-first from the day holding the overall
+    best activity.
+    """
+    if not activities:
+        return []
+
+    lat = np.array([a['latitude'] for a in activities], dtype=np.float64)
+    lon = np.array([a['longitude'] for a in activities], dtype=np.float64)
+    scores = np.array([a.get('score', 0.0) for a in activities], dtype=np.float64)
+    labels = cluster_days(lat, lon, n_days, seed=seed)
+
+    days = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        distances = haversine_matrix(lat[members], lon[members])
+        start = int(scores[members].argmax())
+        route = members[order_route(distances, start)]
+
+        legs = haversine_km(lat[route[:-1]], lon[route[:-1]], lat[route[1:]], lon[route[1:]])
+        days.append({
+            'route': route,
+            'center': (float(lat[members].mean()), float(lon[members].mean())),
+            'best': float(scores[members].max()),
+            'legs': legs
+        })
+
+    # Chain days: start from the day with the best activity, then nearest next day
+    order = [int(np.argmax([d['best'] for d in days]))]
+    remaining = set(range(len(days))) - set(order)
+    while remaining:
+        here = days[order[-1]]['center']
+        nxt = min(remaining, key=lambda i: float(haversine_km(*here, *days[i]['center'])))
+        order.append(nxt)
+        remaining.remove(nxt)
+
+    plan = []
+    for number, index in enumerate(order, start=1):
+        day = days[index]
+        stops = []
+        for position, activity_index in enumerate(day['route']):
+            stop = dict(activities[activity_index])
+            stop['order'] = position + 1
+            stop['distance_from_previous_km'] = round(float(day['legs'][position - 1]), 3) if position else 0.0
+            stops.append(stop)
+        plan.append({
+            'day': number,
+            'activities': stops,
+            'total_distance_km': round(float(day['legs'].sum()), 3),
+            'center': {'lat': round(day['center'][0], 6), 'lng': round(day['center'][1], 6)}
+        })
+
+    return plan
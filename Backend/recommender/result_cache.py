@@ -0,0 +1,77 @@
+# ========== result_cache.py ==========
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters.
+
+    Entries added with pin() live in a separate tier that is checked first
+    and never expires or gets evicted (until clear()).
+    """
+
+    def __init__(self, max_entries=2048, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._pinned = {}              # key -> value, warmed at startup/reload
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.pinned_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value, or None on a miss or expired entry"""
+        now = time.monotonic()
+        with self._lock:
+            if key in self._pinned:
+                self.hits += 1
+                self.pinned_hits += 1
+                return self._pinned[key]
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pin(self, key, value):
+        """Store in the pinned tier (no TTL, no LRU eviction)"""
+        with self._lock:
+            self._pinned[key] = value
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'pinned': len(self._pinned),
+            'pinned_hits': self.pinned_hits,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
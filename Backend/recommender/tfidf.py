@@ -0,0 +1,80 @@
+# ========== tfidf.py ==========
+import re
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class QueryVectorizer:
+    """Serving-side TF-IDF transform built from an exported vocabulary and idf.
+
+    Reproduces the word analyzer of the training TfidfVectorizer (lowercasing,
+    token_pattern, stop-word removal, n-grams) and its weighting (raw or
+    sublinear tf, idf, l1/l2 norm), so queries can be vectorized without
+    importing scikit-learn.
+    """
+
+    def __init__(self, vocabulary, idf, stop_words=(), lowercase=True, ngram_range=(1, 1),
+                 token_pattern=r"(?u)\b\w\w+\b", norm='l2', use_idf=True, sublinear_tf=False,
+                 binary=False):
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.stop_words = frozenset(stop_words or ())
+        self.lowercase = lowercase
+        self.min_n, self.max_n = ngram_range
+        self.token_pattern = re.compile(token_pattern)
+        self.norm = norm
+        self.use_idf = use_idf
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+
+    def analyze(self, text):
+        """Terms of one document, in the order TfidfVectorizer would produce them"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = [t for t in self.token_pattern.findall(text) if t not in self.stop_words]
+
+        terms = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), self.max_n + 1):
+            terms.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def transform(self, texts):
+        """Sparse (len(texts), n_terms) float64 matrix of TF-IDF query vectors"""
+        data, indices, indptr = [], [], [0]
+
+        for text in texts:
+            counts = {}
+            for term in self.analyze(text):
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+
+            columns = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+            weights = np.array([counts[c] for c in columns], dtype=np.float64)
+            if self.binary:
+                weights[:] = 1.0
+            elif self.sublinear_tf:
+                weights = np.log(weights) + 1.0
+            if self.use_idf:
+                weights *= self.idf[columns]
+
+            if self.norm == 'l2':
+                length = np.sqrt((weights ** 2).sum())
+            elif self.norm == 'l1':
+                length = np.abs(weights).sum()
+            else:
+                length = 0.0
+            if length > 0:
+                weights /= length
+
+            data.append(weights)
+            indices.append(columns)
+            indptr.append(indptr[-1] + len(columns))
+
+        return csr_matrix(
+            (np.concatenate(data) if data else np.empty(0),
+             np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+             np.array(indptr, dtype=np.int64)),
+            shape=(len(texts), len(self.vocabulary))
+        )
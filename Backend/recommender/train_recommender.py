@@ -1,14 +1,21 @@
 # ========== train_recommender.py ==========
 import pandas as pd
-import pickle
 import os
+import sys
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.decomposition import TruncatedSVD
 from datetime import datetime
 
+# Allow `python train_recommender.py` from this folder to import the recommender package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def train_recommender_model():
-    """Train TF-IDF recommender model"""
+from recommender.encoding import TRAVELER_TYPES, TRAVELER_BITS, encode_traveler_mask, encode_categories
+from recommender.artifacts import write_artifacts, ModelArtifacts
+
+
+def train_recommender_model(data_path='data/pois_84_cities.csv', models_dir='models'):
+    """Train TF-IDF recommender model and publish it under models_dir; returns the artifact path"""
     
     print("\n" + "="*70)
     print("🤖 TRAINING TF-IDF ITINERARY RECOMMENDER")
@@ -18,10 +25,10 @@ def train_recommender_model():
     # ========== 1. LOAD DATA ==========
     print("📖 Loading POI data...")
     try:
-        df = pd.read_csv('data/pois_84_cities.csv')
+        df = pd.read_csv(data_path)
         print(f"   ✅ Loaded {len(df):,} POIs from {df['city'].nunique()} cities\n")
     except FileNotFoundError:
-        print("   ❌ Error: data/pois_84_cities.csv not found!")
+        print(f"   ❌ Error: {data_path} not found!")
         print("   Please run the POI collection script first.")
         return
     
@@ -51,8 +58,14 @@ def train_recommender_model():
     df['category'] = df['category'].fillna('')
     df['description'] = df['description'].fillna('') if 'description' in df.columns else ''
     df['types'] = df['types'].fillna('') if 'types' in df.columns else ''
-    df['rating'] = df['rating'].fillna(0)
-    df['reviews'] = df['reviews'].fillna(0)
+    df['rating'] = df['rating'].fillna(0).astype('float64')
+    df['reviews'] = df['reviews'].fillna(0).astype('int64')
+    
+    # Resolve serving defaults once here so the recommender emits columns as-is
+    for col in ['address', 'phone', 'website', 'suitable_for']:
+        df[col] = df[col].fillna('') if col in df.columns else ''
+    if 'photo_reference' not in df.columns:
+        df['photo_reference'] = None
     
     print(f"   ✅ Data cleaned\n")
     
@@ -68,7 +81,14 @@ def train_recommender_model():
     )
     
     print(f"   ✅ Combined text features created")
-    print(f"   Sample: {df['combined_text'].iloc[0][:100]}...\n")
+    print(f"   Sample: {df['combined_text'].iloc[0][:100]}...")
+    
+    # Integer encodings so serving filters with bitwise/integer ops, not string scans
+    df['traveler_mask'] = encode_traveler_mask(df['suitable_for'].tolist())
+    df['category_code'], category_names = encode_categories(df['category'].tolist())
+    
+    print(f"   ✅ Encoded traveler bitmask ({', '.join(TRAVELER_TYPES)})")
+    print(f"   ✅ Encoded {len(category_names)} category codes\n")
     
     # ========== 4. BUILD TF-IDF MODEL ==========
     print("🧠 Training TF-IDF vectorizer...")
@@ -87,28 +107,47 @@ def train_recommender_model():
     print(f"   ✅ Vocabulary size: {len(tfidf_vectorizer.vocabulary_)}")
     print(f"   ✅ Matrix density: {(tfidf_matrix.nnz / (tfidf_matrix.shape[0] * tfidf_matrix.shape[1]) * 100):.2f}%\n")
     
+    # Optional LSA stage: dense embeddings for the recommender's 'dense' scoring mode
+    lsa_components = lsa_embeddings = None
+    n_components = min(int(os.getenv('LSA_COMPONENTS', '0')), tfidf_matrix.shape[1] - 1)
+    if n_components > 0:
+        print(f"🧠 Fitting LSA (TruncatedSVD, {n_components} components)...")
+        svd = TruncatedSVD(n_components=n_components, random_state=42)
+        lsa_embeddings = svd.fit_transform(tfidf_matrix)
+        lsa_components = svd.components_
+        print(f"   ✅ Explained variance: {svd.explained_variance_ratio_.sum() * 100:.1f}%\n")
+    
     # ========== 5. SAVE MODELS ==========
     print("💾 Saving models...")
     
-    models_dir = 'models'
     os.makedirs(models_dir, exist_ok=True)
     
-    # Save TF-IDF vectorizer
-    vectorizer_path = os.path.join(models_dir, 'tfidf_vectorizer.pkl')
-    with open(vectorizer_path, 'wb') as f:
-        pickle.dump(tfidf_vectorizer, f)
-    print(f"   ✅ Saved TF-IDF vectorizer ({os.path.getsize(vectorizer_path) / 1024:.1f} KB)")
-    
-    # Save TF-IDF matrix (sparse format)
-    matrix_path = os.path.join(models_dir, 'tfidf_matrix.pkl')
-    with open(matrix_path, 'wb') as f:
-        pickle.dump(tfidf_matrix, f)
-    print(f"   ✅ Saved TF-IDF matrix ({os.path.getsize(matrix_path) / 1024:.1f} KB)")
-    
-    # Save POI data
-    data_path = os.path.join(models_dir, 'pois_data.pkl')
-    df.to_pickle(data_path)
-    print(f"   ✅ Saved POI data ({os.path.getsize(data_path) / 1024:.1f} KB)\n")
+    # Memory-mappable artifact: CSR arrays, POI columns and vocabulary as .npy/.json files
+    artifact_path = write_artifacts(
+        models_dir, df, tfidf_vectorizer, tfidf_matrix, category_names,
+        lsa_components=lsa_components, lsa_embeddings=lsa_embeddings
+    )
+    artifact_size = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(artifact_path) for name in files
+    )
+    print(f"   ✅ Saved model artifacts ({artifact_size / 1024:.1f} KB)")
+    print(f"   ✅ Published version: {os.path.basename(artifact_path)}")
+    
+    artifact_manifest = ModelArtifacts(artifact_path).manifest
+    with_distances = sum(offset is not None for offset in artifact_manifest['distance_offsets'])
+    print(f"   ✅ Precomputed distance matrices for {with_distances}/{len(artifact_manifest['partitions'])} cities")
+    radii = [radius for _, _, radius in artifact_manifest['city_geometry']]
+    print(f"   ✅ Derived city centers and radii ({min(radii):.1f}-{max(radii):.1f} km)")
+    print(f"   ✅ Built similar-places graph ({artifact_manifest['neighbors']['k']} neighbours per POI)")
+    
+    bytes_per_poi = artifact_manifest['bytes_per_poi']
+    status = "✅" if bytes_per_poi['columns'] <= bytes_per_poi['target'] else "⚠️"
+    print(f"   {status} Serving columns: {bytes_per_poi['columns']:.0f} B/POI (target {bytes_per_poi['target']} B/POI)")
+    print(f"   ✅ TF-IDF rows: {bytes_per_poi['tfidf']:.0f} B/POI")
+    if bytes_per_poi.get('lsa'):
+        print(f"   ✅ LSA embeddings (int8): {bytes_per_poi['lsa']:.0f} B/POI")
+    print()
     
     # ========== 6. STATISTICS ==========
     print("="*70)
@@ -129,8 +168,8 @@ def train_recommender_model():
         print(f"   {cat}: {count:,}")
     
     print(f"\n👥 TRAVELER TYPE DISTRIBUTION:")
-    for traveler_type in ['family', 'couple', 'solo', 'friends']:
-        count = len(df[df['suitable_for'].str.contains(traveler_type, na=False)])
+    for traveler_type in TRAVELER_TYPES:
+        count = int(((df['traveler_mask'] & TRAVELER_BITS[traveler_type]) != 0).sum())
         pct = (count / len(df)) * 100
         print(f"   {traveler_type.capitalize()}: {count:,} ({pct:.1f}%)")
     
@@ -149,12 +188,20 @@ def train_recommender_model():
     print("✅ TRAINING COMPLETE!")
     print("="*70)
     print(f"⏰ Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"\n📦 Models saved to: {models_dir}/")
-    print(f"   • tfidf_vectorizer.pkl")
-    print(f"   • tfidf_matrix.pkl")
-    print(f"   • pois_data.pkl")
+    print(f"\n📦 Models saved to: {artifact_path}/")
+    print(f"   • manifest.json, vocabulary.json, idf.npy")
+    print(f"   • tfidf_data.npy, tfidf_indices.npy, tfidf_indptr.npy")
+    print(f"   • columns/*.npy")
+    print(f"   • city_distance_km.npy, in_radius.npy")
+    print(f"   • distances.npy")
+    print(f"   • neighbors_indices.npy, neighbors_scores.npy")
+    print(f"   • place_id_index.npy, place_id_rows.npy")
+    if lsa_components is not None:
+        print(f"   • lsa_components.npy, lsa_codes.npy, lsa_scales.npy")
     print(f"\n🚀 Ready to use! Run your Flask app with: python app.py")
     print("="*70 + "\n")
+    
+    return artifact_path
 
 
 if __name__ == '__main__':